@@ -7,15 +7,19 @@ Manages downloading, saving, and linking attachments from messages.
 import asyncio
 import base64
 import datetime
-import json
+import itertools
 import logging
 import os
 from typing import Any
 
 from oden.formatting import create_message_filename
+from oden.json_utils import dumps_line, loads
 
 logger = logging.getLogger(__name__)
 
+# Monotonic JSON-RPC id source for getAttachment requests
+_request_ids = itertools.count()
+
 
 async def _get_attachment_data(
     attachment_id: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
@@ -24,12 +28,10 @@ async def _get_attachment_data(
     Makes a JSON-RPC call to signal-cli to get attachment data by ID.
     Returns base64 encoded data if successful, otherwise None.
     """
-    request_id = datetime.datetime.now().microsecond  # Simple unique ID for the request
+    request_id = f"get-attachment-{next(_request_ids)}"
     json_request = {"jsonrpc": "2.0", "method": "getAttachment", "params": {"id": attachment_id}, "id": request_id}
-    request_str = json.dumps(json_request) + "\n"
-
     try:
-        writer.write(request_str.encode("utf-8"))
+        writer.write(dumps_line(json_request))
         await writer.drain()
 
         # Read response line by line until our request_id is matched
@@ -38,7 +40,7 @@ async def _get_attachment_data(
             logger.error(f"No response for getAttachment request {request_id}")
             return None
 
-        response = json.loads(response_line.decode("utf-8").strip())
+        response = loads(response_line)
 
         if response.get("id") == request_id and "result" in response:
             return response["result"].get("data")
@@ -50,6 +52,17 @@ async def _get_attachment_data(
         return None
 
 
+def _write_attachment(path: str, data: str) -> None:
+    """Decodes base64 attachment data and writes it to path.
+
+    This is blocking; save_attachments runs it via asyncio.to_thread so large
+    attachments do not stall the signal-cli reader.
+    """
+    decoded_data = base64.b64decode(data)
+    with open(path, "wb") as f:
+        f.write(decoded_data)
+
+
 async def save_attachments(
     attachments: list[dict[str, Any]],
     group_dir: str,
@@ -91,7 +104,6 @@ async def save_attachments(
 
         if data and filename:
             try:
-                decoded_data = base64.b64decode(data)
                 # Sanitize filename to prevent path traversal attacks
                 # os.path.basename strips directory components like "../" or "subdir/"
                 sanitized_filename = os.path.basename(filename)
@@ -100,8 +112,7 @@ async def save_attachments(
                     sanitized_filename = f"attachment_{attachment_id or i + 1}"
                 safe_filename = f"{i + 1}_{sanitized_filename}"
                 attachment_filepath = os.path.join(attachment_dir, safe_filename)
-                with open(attachment_filepath, "wb") as f:
-                    f.write(decoded_data)
+                await asyncio.to_thread(_write_attachment, attachment_filepath, data)
 
                 attachment_links.append(f"![[{attachment_subdir_name}/{safe_filename}]]")
                 logger.info(f"Saved attachment: {attachment_filepath}")
@@ -220,8 +220,8 @@ def reload_config() -> dict:
     REGEX_PATTERNS = app_config.get("regex_patterns", {})
     TIMEZONE = app_config["timezone"]
     APPEND_WINDOW_MINUTES = app_config.get("append_window_minutes", 30)
-    IGNORED_GROUPS = app_config.get("ignored_groups", [])
-    WHITELIST_GROUPS = app_config.get("whitelist_groups", [])
+    IGNORED_GROUPS = frozenset(app_config.get("ignored_groups", []))
+    WHITELIST_GROUPS = frozenset(app_config.get("whitelist_groups", []))
     STARTUP_MESSAGE = app_config.get("startup_message", "self")
     PLUS_PLUS_ENABLED = app_config.get("plus_plus_enabled", False)
     FILENAME_FORMAT = app_config.get("filename_format", "classic")
@@ -383,8 +383,8 @@ try:
     REGEX_PATTERNS = app_config.get("regex_patterns", {})
     TIMEZONE = app_config.get("timezone")
     APPEND_WINDOW_MINUTES = app_config.get("append_window_minutes", 30)
-    IGNORED_GROUPS = app_config.get("ignored_groups", [])
-    WHITELIST_GROUPS = app_config.get("whitelist_groups", [])
+    IGNORED_GROUPS = frozenset(app_config.get("ignored_groups", []))
+    WHITELIST_GROUPS = frozenset(app_config.get("whitelist_groups", []))
     STARTUP_MESSAGE = app_config.get("startup_message", "self")
     PLUS_PLUS_ENABLED = app_config.get("plus_plus_enabled", False)
     FILENAME_FORMAT = app_config.get("filename_format", "classic")
@@ -410,8 +410,8 @@ except Exception as e:
     REGEX_PATTERNS = {}
     TIMEZONE = datetime.timezone.utc
     APPEND_WINDOW_MINUTES = 30
-    IGNORED_GROUPS = []
-    WHITELIST_GROUPS = []
+    IGNORED_GROUPS = frozenset()
+    WHITELIST_GROUPS = frozenset()
     STARTUP_MESSAGE = "self"
     PLUS_PLUS_ENABLED = False
     FILENAME_FORMAT = "classic"
@@ -7,6 +7,7 @@ The database is stored in ~/.oden/config.db by default.
 
 import json
 import logging
+import os
 import sqlite3
 from pathlib import Path
 from typing import Any
@@ -306,6 +307,7 @@ def delete_db(db_path: Path) -> bool:
         if db_path.exists():
             db_path.unlink()
             logger.info(f"Deleted config database: {db_path}")
+        _invalidate_response_cache(db_path)
         return True
     except OSError as e:
         logger.error(f"Error deleting config database: {e}")
@@ -530,6 +532,16 @@ Undvik att diskutera i den här kanalen. Om du absolut måste kommentera, använ
 
 _DEFAULT_OK_BODY = "Mottaget."
 
+# Keyword to body maps per database, validated against the database file's mtime:
+# {db_path: (st_mtime_ns, {keyword: body})}. Holding the whole table keeps the
+# cache bounded by its size, whatever keywords senders try.
+_response_cache: dict[Path, tuple[int, dict[str, str]]] = {}
+
+
+def _invalidate_response_cache(db_path: Path) -> None:
+    """Drop cached keyword lookups for a database after it has been modified."""
+    _response_cache.pop(db_path, None)
+
 
 def _seed_default_responses(cursor: sqlite3.Cursor) -> None:
     """Insert default responses into a fresh responses table."""
@@ -562,24 +574,37 @@ def get_all_responses(db_path: Path) -> list[dict[str, Any]]:
 
 
 def get_response_by_keyword(db_path: Path, keyword: str) -> str | None:
-    """Look up a response body by keyword (case-insensitive, uses json_each)."""
-    if not db_path.exists():
-        return None
+    """Look up a response body by keyword (case-insensitive, uses json_each).
 
-    conn = sqlite3.connect(db_path)
+    All keywords are loaded in one query and reused for as long as the database
+    file's mtime is unchanged, so repeated commands skip SQLite.
+    """
     try:
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT body FROM responses, json_each(responses.keywords) WHERE LOWER(json_each.value) = ? LIMIT 1",
-            (keyword.lower(),),
-        )
-        row = cursor.fetchone()
-        return row[0] if row else None
-    except sqlite3.Error as e:
-        logger.error(f"Error looking up response for keyword '{keyword}': {e}")
+        mtime_ns = os.stat(db_path).st_mtime_ns
+    except OSError:
         return None
-    finally:
-        conn.close()
+
+    cached = _response_cache.get(db_path)
+    if cached is None or cached[0] != mtime_ns:
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT LOWER(json_each.value), body FROM responses, json_each(responses.keywords) "
+                "WHERE json_each.value IS NOT NULL ORDER BY responses.id"
+            )
+            keywords: dict[str, str] = {}
+            for value, body in cursor:
+                # The first response listing a keyword wins
+                keywords.setdefault(str(value), body)
+        except sqlite3.Error as e:
+            logger.error(f"Error looking up response for keyword '{keyword}': {e}")
+            return None
+        finally:
+            conn.close()
+        cached = _response_cache[db_path] = (mtime_ns, keywords)
+
+    return cached[1].get(keyword.lower())
 
 
 def get_response_by_id(db_path: Path, response_id: int) -> dict[str, Any] | None:
@@ -619,6 +644,7 @@ def create_response(db_path: Path, keywords: list[str], body: str) -> int | None
             (json.dumps(normalized, ensure_ascii=False), body),
         )
         conn.commit()
+        _invalidate_response_cache(db_path)
         return cursor.lastrowid
     except sqlite3.Error as e:
         logger.error(f"Error creating response: {e}")
@@ -644,6 +670,7 @@ def save_response(db_path: Path, response_id: int, keywords: list[str], body: st
             (json.dumps(normalized, ensure_ascii=False), body, response_id),
         )
         conn.commit()
+        _invalidate_response_cache(db_path)
         return cursor.rowcount > 0
     except sqlite3.Error as e:
         logger.error(f"Error saving response id={response_id}: {e}")
@@ -662,6 +689,7 @@ def delete_response(db_path: Path, response_id: int) -> bool:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM responses WHERE id = ?", (response_id,))
         conn.commit()
+        _invalidate_response_cache(db_path)
         return cursor.rowcount > 0
     except sqlite3.Error as e:
         logger.error(f"Error deleting response id={response_id}: {e}")
@@ -1,13 +1,41 @@
 import datetime
+import functools
 import logging
+import operator
 import os
 import re
+import time
 from typing import Any
 
 from oden import config as cfg
 
 logger = logging.getLogger(__name__)
 
+# Results of find_latest_file_by_fileid, validated against the group directory's
+# mtime and the minute they were computed for, since a report dated later than that
+# minute only becomes a candidate once it arrives:
+# {(group_dir, sender_pattern, window_minutes): ((st_mtime_ns, minute, tzinfo), path)}
+_latest_file_cache: dict[
+    tuple[str, str, int], tuple[tuple[int, datetime.datetime, datetime.tzinfo | None], str | None]
+] = {}
+_LATEST_FILE_CACHE_MAX = 1024
+
+# Directories modified more recently than this are not cached, since a file created
+# within the same mtime tick would not change the directory mtime again.
+_RACY_MTIME_NS = 2_000_000_000
+
+# Reports written by this process, newest per sender, so appends right after a
+# write need no directory scan: {(group_dir, sender_pattern): (path, file_dt)}
+_recent_files: dict[tuple[str, str], tuple[str, datetime.datetime]] = {}
+_RECENT_FILES_MAX = 1024
+
+# Characters replaced with "_" in group directory names and sender ids
+_UNSAFE_TITLE_RE = re.compile(r"[^\w\-_\. ]")
+_UNSAFE_SOURCE_RE = re.compile(r"[^\w\-_\.]")
+
+# fileid line in a report's YAML frontmatter
+_FILEID_RE = re.compile(r'^fileid:\s*["\']?([^"\'\n]+)["\']?\s*$', re.MULTILINE)
+
 # ==============================================================================
 # FILENAME AND CONTENT FORMATTING
 # ==============================================================================
@@ -15,7 +43,7 @@ logger = logging.getLogger(__name__)
 
 def get_safe_group_dir_path(group_title: str) -> str:
     """Sanitizes a group title and returns the full path for the group's directory."""
-    safe_title = re.sub(r"[^\w\-_\. ]", "_", group_title)
+    safe_title = _UNSAFE_TITLE_RE.sub("_", group_title)
     return os.path.join(cfg.VAULT_PATH, safe_title)
 
 
@@ -42,7 +70,7 @@ def create_fileid(dt: datetime.datetime, source_name: str | None, source_number:
     if not parts:
         parts.append("unknown")
 
-    safe_source = re.sub(r"[^\w\-_\.]", "_", "-".join(parts))
+    safe_source = _UNSAFE_SOURCE_RE.sub("_", "-".join(parts))
     return f"{tnr}-{safe_source}"
 
 
@@ -74,7 +102,7 @@ def create_message_filename(
 
     if filename_format == "tnr-name":
         if source_name:
-            safe_name = re.sub(r"[^\w\-_\.]", "_", source_name)
+            safe_name = _UNSAFE_SOURCE_RE.sub("_", source_name)
             return f"{tnr}-{safe_name}.md"
         else:
             return f"{tnr}.md"
@@ -89,7 +117,7 @@ def create_message_filename(
     if not parts:
         parts.append("unknown")
 
-    safe_source = re.sub(r"[^\w\-_\.]", "_", "-".join(parts))
+    safe_source = _UNSAFE_SOURCE_RE.sub("_", "-".join(parts))
     return f"{tnr}-{safe_source}.md"
 
 
@@ -105,7 +133,7 @@ def get_unique_filename(group_dir: str, base_filename: str) -> str:
         Unique filename with suffix if needed (e.g., '261427-1.md' or '261427-Nicklas-1.md')
     """
     full_path = os.path.join(group_dir, base_filename)
-    if not os.path.exists(full_path):
+    if not os.path.lexists(full_path):
         return base_filename
 
     # Split filename to insert suffix before .md
@@ -116,7 +144,7 @@ def get_unique_filename(group_dir: str, base_filename: str) -> str:
     while True:
         new_filename = f"{name_without_ext}-{counter}.md"
         new_path = os.path.join(group_dir, new_filename)
-        if not os.path.exists(new_path):
+        if not os.path.lexists(new_path):
             return new_filename
         counter += 1
 
@@ -147,7 +175,7 @@ def _extract_fileid_from_file(filepath: str) -> str | None:
         frontmatter = content[3:end_idx]
 
         # Extract fileid
-        match = re.search(r'^fileid:\s*["\']?([^"\'\n]+)["\']?\s*$', frontmatter, re.MULTILINE)
+        match = _FILEID_RE.search(frontmatter)
         if match:
             return match.group(1).strip()
 
@@ -156,7 +184,92 @@ def _extract_fileid_from_file(filepath: str) -> str | None:
         return None
 
 
-def find_latest_file_by_fileid(group_dir: str, source_name: str | None, source_number: str | None) -> str | None:
+def _sender_pattern(source_name: str | None, source_number: str | None) -> str | None:
+    """Returns the sender part of a fileid (same logic as create_fileid but without TNR)."""
+    sender_id_parts = []
+    if source_number:
+        sender_id_parts.append(source_number.lstrip("+"))
+    if source_name:
+        sender_id_parts.append(source_name)
+
+    if not sender_id_parts:
+        return None
+
+    return _UNSAFE_SOURCE_RE.sub("_", "-".join(sender_id_parts))
+
+
+def remember_written_file(path: str, dt: datetime.datetime, source_name: str | None, source_number: str | None) -> None:
+    """
+    Records a newly written report so find_latest_file_by_fileid can return it without
+    scanning the group directory.
+
+    The file is registered under the full sender id and the number alone, since reply
+    appends look up the quoted author by number only.
+    """
+    group_dir = os.path.dirname(path)
+    # Filenames only carry the minute, so keep the same precision as a directory scan
+    dt = dt.replace(second=0, microsecond=0)
+    for pattern in {_sender_pattern(source_name, source_number), _sender_pattern(None, source_number)}:
+        if pattern is None:
+            continue
+        key = (group_dir, pattern)
+        previous = _recent_files.pop(key, None)
+        # Keep the newer report if messages are processed out of order
+        _recent_files[key] = previous if previous is not None and previous[1] > dt else (path, dt)
+
+    while len(_recent_files) > _RECENT_FILES_MAX:
+        del _recent_files[next(iter(_recent_files))]
+
+
+@functools.lru_cache(maxsize=4)
+def _append_window(
+    minute: datetime.datetime, tzinfo: datetime.tzinfo | None, window_minutes: int
+) -> dict[str, datetime.datetime]:
+    """
+    Maps every DDHHMM stamp inside the append window ending at minute to its datetime.
+
+    Each candidate file then costs a single dict lookup. Walking back minute by minute
+    also handles month rollover without any date arithmetic per file. The table only
+    changes once a minute, so it is cached; tzinfo is part of the cache key because
+    aware datetimes for the same instant compare equal across time zones.
+    """
+    window: dict[str, datetime.datetime] = {}
+    cursor = minute
+    one_minute = datetime.timedelta(minutes=1)
+    for _ in range(window_minutes):
+        window[cursor.strftime("%d%H%M")] = cursor
+        cursor -= one_minute
+    return window
+
+
+def _append_candidate(
+    filename: str, filepath: str, window: dict[str, datetime.datetime], sender_pattern: str
+) -> tuple[datetime.datetime, str] | None:
+    """Returns (file_dt, filepath) if the file is an append target for sender_pattern, else None."""
+    # Every filename format starts with the same DDHHMM as the fileid, so files
+    # outside the append window are skipped without opening them.
+    file_dt = window.get(filename[:6])
+    if file_dt is None:
+        return None
+
+    fileid = _extract_fileid_from_file(filepath)
+    if fileid:
+        # Check if fileid contains the sender pattern
+        if sender_pattern not in fileid:
+            return None
+    elif sender_pattern not in filename:
+        # Fallback: classic filenames carry the sender for backwards compatibility
+        return None
+
+    return file_dt, filepath
+
+
+def find_latest_file_by_fileid(
+    group_dir: str,
+    source_name: str | None,
+    source_number: str | None,
+    now: datetime.datetime | None = None,
+) -> str | None:
     """
     Finds the most recent file by a given sender in a group directory using fileid lookup.
     Returns the path to the most recent file within APPEND_WINDOW_MINUTES, or None.
@@ -168,101 +281,80 @@ def find_latest_file_by_fileid(group_dir: str, source_name: str | None, source_n
         group_dir: Directory to search
         source_name: Sender's name
         source_number: Sender's phone number
+        now: Current time in the configured time zone; looked up if not given
 
     Returns:
         Path to the most recent matching file, or None if not found within window
     """
-    # Construct the fileid pattern to match (same logic as create_fileid but without TNR)
-    sender_id_parts = []
-    if source_number:
-        sender_id_parts.append(source_number.lstrip("+"))
-    if source_name:
-        sender_id_parts.append(source_name)
+    sender_pattern = _sender_pattern(source_name, source_number)
+    if sender_pattern is None:
+        return None
 
-    if not sender_id_parts:
+    window_minutes = cfg.APPEND_WINDOW_MINUTES
+    if now is None:
+        now = datetime.datetime.now(cfg.TIMEZONE)
+
+    # A report this process wrote for the sender is the newest one, unless it has
+    # aged out of the window or been removed from the vault since.
+    # The same minute window as the scan below applies, so a report dated after now
+    # is left to the scan, which does not pick it either.
+    minute = now.replace(second=0, microsecond=0)
+    recent_key = (group_dir, sender_pattern)
+    recent = _recent_files.get(recent_key)
+    if recent is not None and recent[1] <= minute:
+        recent_file, recent_time = recent
+        if minute - recent_time < datetime.timedelta(minutes=window_minutes) and os.path.isfile(recent_file):
+            return recent_file
+        del _recent_files[recent_key]
+
+    try:
+        dir_mtime_ns = os.stat(group_dir).st_mtime_ns
+    except FileNotFoundError:
         return None
 
-    sender_pattern = re.sub(r"[^\w\-_\.]", "_", "-".join(sender_id_parts))
+    # An unchanged directory has the same files, so within the same minute (and
+    # time zone) the previous result still holds.
+    cache_key = (group_dir, sender_pattern, window_minutes)
+    validity = (dir_mtime_ns, minute, minute.tzinfo)
+    cached = _latest_file_cache.get(cache_key)
+    if cached is not None and cached[0] == validity:
+        return cached[1]
 
-    latest_file = None
-    latest_time = datetime.datetime.min.replace(tzinfo=cfg.TIMEZONE)
-    now = datetime.datetime.now(cfg.TIMEZONE)
+    window = _append_window(minute, now.tzinfo, window_minutes)
 
     try:
-        candidate_files = [f for f in os.listdir(group_dir) if f.endswith(".md")]
+        with os.scandir(group_dir) as entries:
+            candidates = [(entry.name, entry.path) for entry in entries if entry.name.endswith(".md")]
     except FileNotFoundError:
         return None
 
-    for filename in candidate_files:
-        filepath = os.path.join(group_dir, filename)
-        fileid = _extract_fileid_from_file(filepath)
-
-        if not fileid:
-            # Fallback: check if filename matches classic pattern for backwards compatibility
-            if sender_pattern not in filename:
-                continue
-            # Extract timestamp from filename
-            try:
-                ts_str = filename.split("-")[0]
-                if len(ts_str) != 6:
-                    continue
-            except (ValueError, IndexError):
-                continue
-        else:
-            # Check if fileid contains the sender pattern
-            if sender_pattern not in fileid:
-                continue
-            # Extract TNR from fileid (first 6 chars are DDHHMM)
-            ts_str = fileid[:6]
-
-        try:
-            day = int(ts_str[0:2])
-            hour = int(ts_str[2:4])
-            minute = int(ts_str[4:6])
-
-            if not (1 <= day <= 31 and 0 <= hour <= 23 and 0 <= minute <= 59):
-                continue
-
-            try:
-                file_dt = now.replace(day=day, hour=hour, minute=minute, second=0, microsecond=0)
-            except ValueError:
-                continue
-
-            # Handle month rollover
-            if file_dt > now:
-                prev_month = now.month - 1 if now.month > 1 else 12
-                prev_year = now.year if now.month > 1 else now.year - 1
-                try:
-                    file_dt = now.replace(
-                        year=prev_year, month=prev_month, day=day, hour=hour, minute=minute, second=0, microsecond=0
-                    )
-                except ValueError:
-                    continue
-                if file_dt > now:
-                    continue
-
-            # Check if within append window
-            time_diff = now - file_dt
-            if time_diff < datetime.timedelta(minutes=cfg.APPEND_WINDOW_MINUTES) and (
-                latest_file is None or file_dt > latest_time
-            ):
-                latest_time = file_dt
-                latest_file = filepath
-                logger.debug(f"Found candidate file: {filename} (age: {time_diff})")
-
-        except (ValueError, IndexError) as e:
-            logger.debug(f"Skipping file {filename}: {e}")
-            continue
+    # max() keeps the first of equally recent files, like a strict ">" scan would
+    best = max(
+        (
+            match
+            for filename, filepath in candidates
+            if (match := _append_candidate(filename, filepath, window, sender_pattern)) is not None
+        ),
+        key=operator.itemgetter(0),
+        default=None,
+    )
+    latest_time, latest_file = best if best is not None else (None, None)
+
+    if time.time_ns() - dir_mtime_ns > _RACY_MTIME_NS:
+        _latest_file_cache.pop(cache_key, None)
+        _latest_file_cache[cache_key] = (validity, latest_file)
+        while len(_latest_file_cache) > _LATEST_FILE_CACHE_MAX:
+            del _latest_file_cache[next(iter(_latest_file_cache))]
 
     if latest_file:
-        logger.debug(f"Selected latest file for sender: {latest_file}")
+        logger.debug("Selected latest file for sender: %s (age: %s)", latest_file, now - latest_time)
     return latest_file
 
 
 def format_sender_display(source_name: str | None, source_number: str | None) -> str:
     """Constructs a display string for the sender, including name and number."""
     formatted_number = _format_phone_number(source_number)
-    if source_name and source_number:
+    if source_name and formatted_number:
         return f"{source_name} ({formatted_number})"
     return source_name or formatted_number or "Okänd"
 
@@ -294,14 +386,14 @@ def get_message_filepath(
     return os.path.join(group_dir, filename)
 
 
-def _format_quote(quote: dict[str, Any]) -> list[str]:
-    """Formats a quote block into a markdown blockquote."""
+def _format_quote(quote: dict[str, Any]) -> str:
+    """Formats a quote block into a markdown blockquote string."""
     author_name = quote.get("authorName")
     author_number = quote.get("authorNumber")
     author_display = format_sender_display(author_name, author_number)
     text = quote.get("text", "...")
 
     # Indent every line of the quoted text for markdown blockquote
-    quoted_lines = [f"> {line}" for line in text.split("\n")]
+    quoted_text = "\n> ".join(text.split("\n"))
 
-    return [f"> **Svarar på {author_display}:**", *quoted_lines]
+    return f"> **Svarar på {author_display}:**\n> {quoted_text}"
@@ -0,0 +1,39 @@
+"""
+JSON encoding helpers for the signal-cli JSON-RPC connection.
+
+Uses orjson when it is installed (``pip install oden[fast]``) and falls back
+to the standard library json module otherwise. Both paths produce the same
+compact, UTF-8 encoded output, so signal-cli sees identical frames either way.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize obj to compact UTF-8 encoded JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Serialize obj to a newline-terminated JSON-RPC frame."""
+    return dumps(obj) + b"\n"
+
+
+def loads(data: bytes | str) -> Any:
+    """Deserialize a JSON document.
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON (orjson's error type
+            is a subclass, so callers can catch the stdlib exception).
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
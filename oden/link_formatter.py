@@ -11,6 +11,9 @@ from oden import config as cfg
 
 logger = logging.getLogger(__name__)
 
+# Matches existing Obsidian links, e.g. [[REG123]]
+_EXISTING_LINK_RE = re.compile(r"\[\[([^\]]+)\]\]")
+
 
 def apply_regex_links(text: str | None) -> str | None:
     """
@@ -21,7 +24,7 @@ def apply_regex_links(text: str | None) -> str | None:
         return text
 
     # Find all existing [[...]] patterns to avoid double-linking
-    existing_links = set(re.findall(r"\[\[([^\]]+)\]\]", text))
+    existing_links = set(_EXISTING_LINK_RE.findall(text)) if "[[" in text else set()
 
     for pattern_name, pattern in cfg.REGEX_PATTERNS.items():
         try:
@@ -0,0 +1,73 @@
+"""
+Batched rotating log file handler.
+
+Used behind the QueueListener set up by configure_logging, where it writes
+bursts of log records with a single write, flush and rollover check.
+"""
+
+import contextlib
+import logging
+import os
+import queue
+from logging.handlers import RotatingFileHandler
+from typing import Any
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """A RotatingFileHandler that writes records in batches.
+
+    Formatted records are collected while more records are waiting in the
+    listener's queue. The batch is written once the queue is empty or
+    ``batch_size`` records have been collected, so an idle log is still written
+    immediately.
+    """
+
+    def __init__(
+        self,
+        filename: str | os.PathLike[str],
+        pending: queue.SimpleQueue[Any],
+        batch_size: int = 64,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(filename, **kwargs)
+        self._pending = pending
+        self._batch_size = batch_size
+        self._batch: list[str] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Add a record to the batch and write the batch if it is complete."""
+        try:
+            self._batch.append(self.format(record) + self.terminator)
+            if len(self._batch) >= self._batch_size or self._pending.empty():
+                self._write_batch()
+        except Exception:
+            self.handleError(record)
+
+    def _write_batch(self) -> None:
+        """Write the collected records, rolling the file over first if needed."""
+        if not self._batch:
+            return
+        text = "".join(self._batch)
+        self._batch.clear()
+        if self.stream is None:  # delay was set
+            self.stream = self._open()
+        # Same rule as RotatingFileHandler.shouldRollover, checked once per batch
+        # (see bpo-45401: never roll over anything other than regular files)
+        if self.maxBytes > 0 and os.path.isfile(self.baseFilename):
+            self.stream.seek(0, 2)
+            if self.stream.tell() + len(text) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+        self.stream.write(text)
+        self.flush()
+
+    def close(self) -> None:
+        """Write any pending records before closing the file."""
+        self.acquire()
+        try:
+            with contextlib.suppress(Exception):
+                self._write_batch()
+        finally:
+            self.release()
+        super().close()
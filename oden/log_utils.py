@@ -72,6 +72,8 @@ def write_log_level(level_str: str) -> None:
 def apply_log_level(level: int) -> None:
     """Apply a log level to the root logger and all its handlers.
 
+    Handlers behind a QueueHandler's listener are updated as well.
+
     Args:
         level: Logging level constant (e.g. logging.INFO).
     """
@@ -79,4 +81,8 @@ def apply_log_level(level: int) -> None:
     root.setLevel(level)
     for handler in root.handlers:
         handler.setLevel(level)
+        listener = getattr(handler, "listener", None)
+        if listener is not None:
+            for queued_handler in listener.handlers:
+                queued_handler.setLevel(level)
     logger.info("Log level set to %s", logging.getLevelName(level))
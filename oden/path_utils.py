@@ -6,6 +6,7 @@ directory operations to prevent directory traversal attacks and ensure
 consistent path handling across the codebase.
 """
 
+import functools
 import logging
 import os
 import re
@@ -16,6 +17,19 @@ logger = logging.getLogger(__name__)
 # Characters not allowed in filenames (cross-platform safe)
 UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
 
+# Translation table equivalent to UNSAFE_FILENAME_CHARS, used by sanitize_filename
+_UNSAFE_FILENAME_TABLE = str.maketrans(dict.fromkeys([*'<>:"/\\|?*', *map(chr, range(0x20))], "_"))
+
+
+@functools.lru_cache(maxsize=1)
+def _user_home() -> Path:
+    """Return the resolved user home directory.
+
+    The home directory does not change during the process lifetime, so the
+    lookup and realpath are only done once.
+    """
+    return Path.home().resolve()
+
 
 def normalize_path(path: str | Path) -> Path:
     """Expand user (~) and resolve path to absolute form.
@@ -48,11 +62,16 @@ def is_within_directory(path: Path, parent: Path) -> bool:
     Returns:
         True if path is within or equal to parent directory.
     """
-    try:
-        path.relative_to(parent)
+    # Plain string comparison avoids the exception raised by Path.relative_to
+    # on every miss. normcase keeps Windows comparisons case-insensitive.
+    path_str = os.path.normcase(str(path))
+    parent_str = os.path.normcase(str(parent))
+    if path_str == parent_str:
         return True
-    except ValueError:
-        return False
+    # The root directory already ends with a separator (e.g. "/" or "C:\\")
+    if not parent_str.endswith(os.sep):
+        parent_str += os.sep
+    return path_str.startswith(parent_str)
 
 
 def is_filesystem_root(path: Path) -> bool:
@@ -109,7 +128,7 @@ def validate_path_within_home(
 
     # Must be within user's home directory
     try:
-        user_home = Path.home().resolve()
+        user_home = _user_home()
         if not is_within_directory(resolved, user_home):
             logger.warning("Path rejected: %s is outside home directory %s", resolved, user_home)
             return None, f"Sökväg måste vara under {user_home}"
@@ -168,7 +187,7 @@ def validate_ini_file_path(
 
     # Determine parent constraint: either the provided directory or user home by default
     try:
-        parent = normalize_path(must_be_within) if must_be_within is not None else Path.home().resolve()
+        parent = normalize_path(must_be_within) if must_be_within is not None else _user_home()
     except (OSError, RuntimeError, ValueError):
         return None, "Ogiltig föräldrasökväg"
 
@@ -212,7 +231,7 @@ def sanitize_filename(filename: str, fallback: str = "unnamed") -> str:
     safe = safe.replace("..", "")
 
     # Remove unsafe characters
-    safe = UNSAFE_FILENAME_CHARS.sub("_", safe)
+    safe = safe.translate(_UNSAFE_FILENAME_TABLE)
 
     # Strip leading/trailing whitespace and dots
     safe = safe.strip(". \t\n\r")
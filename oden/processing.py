@@ -1,6 +1,6 @@
 import asyncio
 import datetime
-import json
+import itertools
 import logging
 import os
 import re
@@ -17,10 +17,17 @@ from oden.formatting import (
     format_sender_display,
     get_message_filepath,
     get_safe_group_dir_path,
+    remember_written_file,
 )
+from oden.json_utils import dumps
 from oden.link_formatter import apply_regex_links
 from oden.template_loader import render_append, render_report
 
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 logger = logging.getLogger(__name__)
 
 # ==============================================================================
@@ -28,14 +35,19 @@ logger = logging.getLogger(__name__)
 # ==============================================================================
 
 
-def _find_latest_file_for_sender(group_dir: str, source_name: str | None, source_number: str | None) -> str | None:
+def _find_latest_file_for_sender(
+    group_dir: str,
+    source_name: str | None,
+    source_number: str | None,
+    now: datetime.datetime | None = None,
+) -> str | None:
     """
     Finds the most recent file by a given sender in a group directory.
     Returns the path to the most recent file within APPEND_WINDOW_MINUTES, or None.
 
     This is a wrapper around find_latest_file_by_fileid from formatting.py.
     """
-    return find_latest_file_by_fileid(group_dir, source_name, source_number)
+    return find_latest_file_by_fileid(group_dir, source_name, source_number, now)
 
 
 def _apply_regex_links(text: str | None) -> str | None:
@@ -43,24 +55,39 @@ def _apply_regex_links(text: str | None) -> str | None:
     Wrapper function for backward compatibility.
     Use apply_regex_links from link_formatter module instead.
     """
+    # Configured patterns are arbitrary (e.g. plates and phone numbers), so only
+    # the cases that can never produce a link are short-circuited here.
+    if not text or not cfg.REGEX_PATTERNS:
+        return text
     return apply_regex_links(text)
 
 
 # Coordinate pattern: optional minus, digits, dot, digits (e.g. 59.514828 or -33.8688)
 _COORD = r"(-?\d+\.\d+)"
 
-# Compiled location URL patterns, tried in order.
-_LOCATION_PATTERNS: list[re.Pattern[str]] = [
+# Location URL patterns, combined into a single regex below.
+_LOCATION_PATTERNS: list[str] = [
     # Google Maps: maps.google.com/maps?q=LAT%2CLON  or  www.google.com/maps?q=LAT,LON
-    re.compile(rf"https://(?:www\.)?(?:maps\.)?google\.com/maps\?q={_COORD}(?:%2[cC]|,){_COORD}"),
+    rf"https://(?:www\.)?(?:maps\.)?google\.com/maps\?q={_COORD}(?:%2[cC]|,){_COORD}",
     # Apple Maps: maps.apple.com/?q=LAT,LON  or  maps.apple.com/?ll=LAT,LON
-    re.compile(rf"https://maps\.apple\.com/\?(?:[^\s]*&)?(?:q|ll)={_COORD},{_COORD}"),
+    rf"https://maps\.apple\.com/\?(?:[^\s]*&)?(?:q|ll)={_COORD},{_COORD}",
     # OpenStreetMap query params: ?mlat=LAT&mlon=LON
-    re.compile(rf"https://(?:www\.)?openstreetmap\.org/?\?(?:[^\s]*&)?mlat={_COORD}&(?:[^\s]*&)?mlon={_COORD}"),
+    rf"https://(?:www\.)?openstreetmap\.org/?\?(?:[^\s]*&)?mlat={_COORD}&(?:[^\s]*&)?mlon={_COORD}",
     # OpenStreetMap hash fragment: #map=ZOOM/LAT/LON
-    re.compile(rf"https://(?:www\.)?openstreetmap\.org/?[^\s]*#map=[\d.]+/{_COORD}/{_COORD}"),
+    rf"https://(?:www\.)?openstreetmap\.org/?[^\s]*#map=[\d.]+/{_COORD}/{_COORD}",
 ]
 
+# Every alternative captures exactly (lat, lon), so the matched pair is always
+# the last two groups that participated in the match.
+# RE2 (``pip install oden[fast]``) matches in linear time without backtracking;
+# the patterns use only syntax both engines accept. RE2's \d and \s are ASCII-only,
+# so the stdlib fallback is compiled with re.ASCII to match the same inputs.
+_LOCATION_SOURCE = "|".join(f"(?:{pattern})" for pattern in _LOCATION_PATTERNS)
+_LOCATION_RE = re2.compile(_LOCATION_SOURCE) if re2 is not None else re.compile(_LOCATION_SOURCE, re.ASCII)
+
+# Host substrings present in every URL matched above, used to pre-screen messages
+_LOCATION_HOSTS = ("google.com/maps", "maps.apple.com", "openstreetmap.org")
+
 
 def extract_coordinates(msg: str) -> tuple[str, str] | None:
     """Extract latitude and longitude from a location URL in a message.
@@ -73,41 +100,50 @@ def extract_coordinates(msg: str) -> tuple[str, str] | None:
     Returns:
         A (lat, lon) tuple of strings, or None if no location URL is found.
     """
-    for pattern in _LOCATION_PATTERNS:
-        match = pattern.search(msg)
-        if match:
-            return match.group(1), match.group(2)
+    # Most messages contain no map link at all and never reach the regex
+    if not any(host in msg for host in _LOCATION_HOSTS):
+        return None
+    match = _LOCATION_RE.search(msg)
+    if match:
+        return match.group(match.lastindex - 1), match.group(match.lastindex)
     return None
 
 
+# Shared empty mapping used as a lookup fallback; never mutated or returned.
+_EMPTY: dict[str, Any] = {}
+
+
 def _extract_message_details(
     envelope: dict[str, Any],
-) -> tuple[str | None, str | None, str | None, list[dict[str, Any]]]:
+) -> tuple[str | None, str | None, str | None, list[dict[str, Any]], dict[str, Any] | None]:
     """
-    Helper to extract message content, group title, and group id from an envelope.
+    Helper to extract message content, group title, group id, attachments and quote from an envelope.
     Handles both incoming data messages and outgoing sync messages.
     """
-    if "dataMessage" in envelope:
-        dm = envelope.get("dataMessage", {})
-        group_meta = dm.get("groupV2") or dm.get("group") or dm.get("groupInfo") or {}
+    # Look up each container once; missing sub-objects fall back to a shared
+    # read-only empty dict instead of a fresh one per message.
+    if (dm := envelope.get("dataMessage")) is not None:
+        group_meta = dm.get("groupV2") or dm.get("group") or dm.get("groupInfo") or _EMPTY
         return (
             dm.get("message") or dm.get("body"),
             group_meta.get("name") or group_meta.get("title") or group_meta.get("groupName"),
             group_meta.get("id") or group_meta.get("groupId"),
-            dm.get("attachments", []),
+            dm.get("attachments") or [],
+            dm.get("quote"),
         )
 
-    if "syncMessage" in envelope:
-        sent = envelope.get("syncMessage", {}).get("sentMessage", {})
-        group_info = sent.get("groupInfo", {})
+    if (sync := envelope.get("syncMessage")) is not None:
+        sent = sync.get("sentMessage") or _EMPTY
+        group_info = sent.get("groupInfo") or _EMPTY
         return (
             sent.get("message"),
             group_info.get("groupName") or group_info.get("title") or group_info.get("name"),
             group_info.get("groupId"),
-            sent.get("attachments", []),
+            sent.get("attachments") or [],
+            sent.get("quote"),
         )
 
-    return None, None, None, []
+    return None, None, None, [], None
 
 
 async def _get_attachment_data(
@@ -138,19 +174,50 @@ async def _save_attachments(
     return await save_attachments(attachments, group_dir, dt, source_name, source_number, reader, writer)
 
 
+# Group directories this process has already created, so steady-state writes
+# skip the per-component stat() calls that os.makedirs performs.
+_ensured_dirs: set[str] = set()
+
+
+def _ensure_group_dir(group_dir: str) -> None:
+    """Creates group_dir unless it has already been created by this process."""
+    if group_dir not in _ensured_dirs:
+        os.makedirs(group_dir, exist_ok=True)
+        _ensured_dirs.add(group_dir)
+
+
+def _write_markdown(path: str, content: str, append: bool = False) -> None:
+    """Writes (or appends) markdown content to a file.
+
+    The content is encoded once up front and written through a binary file,
+    skipping the text layer of a text-mode open(). The buffered writer keeps
+    writing until every byte is on disk, or raises.
+
+    This is blocking; process_message runs it via asyncio.to_thread so disk
+    latency does not stall the signal-cli reader.
+    """
+    data = content.encode("utf-8")
+    with open(path, "ab" if append else "wb") as f:
+        f.write(data)
+
+
+# Monotonic JSON-RPC id source for outgoing replies (unique for the process lifetime)
+_send_request_ids = itertools.count()
+
+
 async def _send_reply(group_id: str, message: str, writer: asyncio.StreamWriter) -> None:
     """Sends a reply message to a given group ID via signal-cli JSON-RPC."""
-    request_id = f"send-{datetime.datetime.now().microsecond}"
+    request_id = f"send-{next(_send_request_ids)}"
     json_request = {
         "jsonrpc": "2.0",
         "method": "send",
         "params": {"groupId": group_id, "message": message},
         "id": request_id,
     }
-    request_str = json.dumps(json_request) + "\n"
 
     try:
-        writer.write(request_str.encode("utf-8"))
+        # writelines hands both chunks to the transport without joining them first
+        writer.writelines((dumps(json_request), b"\n"))
         await writer.drain()
         logger.info(f"Sent reply to {group_id}")
     except Exception as e:
@@ -171,35 +238,40 @@ async def process_message(obj: dict[str, Any], reader: asyncio.StreamReader, wri
         logger.debug("Skipping sync message (own outgoing message)")
         return
 
-    msg, group_title, group_id, attachments = _extract_message_details(envelope)
+    msg, group_title, group_id, attachments, quote = _extract_message_details(envelope)
 
     # Whitelist has priority: if set, only allow whitelisted groups
-    if cfg.WHITELIST_GROUPS:
-        if group_title and group_title not in cfg.WHITELIST_GROUPS:
+    whitelist_groups = cfg.WHITELIST_GROUPS
+    if whitelist_groups:
+        if group_title and group_title not in whitelist_groups:
             logger.info(f"Skipping message: group '{group_title}' not in whitelist")
             return
     elif group_title and group_title in cfg.IGNORED_GROUPS:
         logger.info(f"Skipping message from ignored group: {group_title}")
         return
 
+    # Strip once; the stripped text is reused for all prefix checks below
+    stripped = msg.strip() if msg else ""
+
     # If message starts with '--', ignore it.
-    if msg and msg.strip().startswith("--"):
+    if stripped.startswith("--"):
         logger.info("Skipping message: Starts with '--'.")
         return
 
     source_name = envelope.get("sourceName")
     source_number = envelope.get("sourceNumber") or envelope.get("source")
-    dm = envelope.get("dataMessage", {})
-    quote = dm.get("quote")
-    now = datetime.datetime.now(cfg.TIMEZONE)
+    # Config is read per call (it can be reloaded at runtime), but only once
+    tz = cfg.TIMEZONE
+    now = datetime.datetime.now(tz)
 
     # --- Append Logic ---
-    is_plus_plus_append = cfg.PLUS_PLUS_ENABLED and msg and msg.strip().startswith("++")
+    is_plus_plus_append = cfg.PLUS_PLUS_ENABLED and stripped.startswith("++")
     is_reply_append = False
     if quote:
+        # The quote id is the quoted message's timestamp in epoch milliseconds
         quote_ts = quote.get("id", 0)
-        quote_dt = datetime.datetime.fromtimestamp(quote_ts / 1000.0, tz=cfg.TIMEZONE)
-        if (now - quote_dt) < datetime.timedelta(minutes=cfg.APPEND_WINDOW_MINUTES):
+        now_ms = int(now.timestamp() * 1000)
+        if quote_ts and (now_ms - quote_ts) < cfg.APPEND_WINDOW_MINUTES * 60_000:
             is_reply_append = True
 
     if is_plus_plus_append or is_reply_append:
@@ -226,22 +298,22 @@ async def process_message(obj: dict[str, Any], reader: asyncio.StreamReader, wri
             logger.error("Cannot append message, missing target user details.")
             return
 
-        latest_file = _find_latest_file_for_sender(group_dir, append_target_name, append_target_number)
+        latest_file = _find_latest_file_for_sender(group_dir, append_target_name, append_target_number, now)
 
         if latest_file:
-            new_text = ""
-            if msg:
-                new_text = msg.strip().removeprefix("++").strip() if is_plus_plus_append else msg.strip()
+            new_text = stripped.removeprefix("++").strip() if is_plus_plus_append else stripped
 
             attachment_links = []
             if attachments:
-                original_group_dir = os.path.dirname(latest_file)
+                # latest_file was found inside group_dir, so attachments go alongside it
                 attachment_links = await _save_attachments(
-                    attachments, original_group_dir, now, source_name, source_number, reader, writer
+                    attachments, group_dir, now, source_name, source_number, reader, writer
                 )
 
             # Only append if there's actual content (text or attachments)
             if new_text or attachment_links:
+                now_tnr = now.strftime("%d%H%M")
+                now_iso = now.isoformat()
                 sender_display = format_sender_display(source_name, source_number)
                 linked_text = _apply_regex_links(new_text) if new_text else None
 
@@ -253,8 +325,8 @@ async def process_message(obj: dict[str, Any], reader: asyncio.StreamReader, wri
                         append_lat, append_lon = append_coords
 
                 append_content = render_append(
-                    tnr=now.strftime("%d%H%M"),
-                    timestamp_iso=now.isoformat(),
+                    tnr=now_tnr,
+                    timestamp_iso=now_iso,
                     sender_display=sender_display,
                     message=linked_text,
                     attachments=attachment_links or None,
@@ -263,8 +335,7 @@ async def process_message(obj: dict[str, Any], reader: asyncio.StreamReader, wri
                 )
 
                 try:
-                    with open(latest_file, "a", encoding="utf-8") as f:
-                        f.write(append_content)
+                    await asyncio.to_thread(_write_markdown, latest_file, append_content, True)
                     logger.info(f"APPENDED (reply or ++) TO: {latest_file}")
                 except OSError as e:
                     logger.error(f"Failed to append to file {latest_file}: {e}")
@@ -273,14 +344,10 @@ async def process_message(obj: dict[str, Any], reader: asyncio.StreamReader, wri
 
         else:
             logger.info("APPEND FAILED: No recent file found for sender.")
-            if is_reply_append:
-                # If reply-append fails, it should be treated as a new message,
-                # but with the quote intact.
-                quote = dm.get("quote")
-            else:
-                # If ++ append fails, we just process it as a new message without the ++
-                if msg:
-                    msg = msg.strip().removeprefix("++").strip()
+            # If reply-append fails, it is treated as a new message with the quote intact.
+            # If ++ append fails, we just process it as a new message without the ++
+            if not is_reply_append and msg:
+                msg = stripped = stripped.removeprefix("++").strip()
 
         # If the append was successful (or a ++ which always consumes the message), we are done.
         # If a reply-append fails, we continue on to process it as a new message.
@@ -288,8 +355,8 @@ async def process_message(obj: dict[str, Any], reader: asyncio.StreamReader, wri
             return
 
     # --- Handle Standard Commands (#) ---
-    if msg and msg.strip().startswith("#"):
-        command = msg.strip()[1:].lower()
+    if stripped.startswith("#"):
+        command = stripped[1:].lower()
         if not command:
             return
         response_text = get_response_by_keyword(CONFIG_DB, command)
@@ -312,15 +379,14 @@ async def process_message(obj: dict[str, Any], reader: asyncio.StreamReader, wri
         logger.info("Skipping message: Not a group message.")
         return
 
-    dt = (
-        datetime.datetime.fromtimestamp(envelope.get("timestamp") / 1000.0, tz=cfg.TIMEZONE)
-        if envelope.get("timestamp")
-        else now
-    )
+    timestamp = envelope.get("timestamp")
+    dt = datetime.datetime.fromtimestamp(timestamp / 1000.0, tz=tz) if timestamp else now
+    tnr = dt.strftime("%d%H%M")
+    timestamp_iso = dt.isoformat()
 
     path = get_message_filepath(group_title, dt, source_name, source_number, unique=True)
     group_dir = os.path.dirname(path)
-    os.makedirs(group_dir, exist_ok=True)
+    _ensure_group_dir(group_dir)
 
     # Generate fileid for frontmatter (consistent identification across filename formats)
     fileid = create_fileid(dt, source_name, source_number)
@@ -337,20 +403,17 @@ async def process_message(obj: dict[str, Any], reader: asyncio.StreamReader, wri
     sender_display = format_sender_display(source_name, source_number)
 
     # Format quote block if present
-    quote_formatted = None
-    if quote:
-        quote_lines = _format_quote(quote)
-        quote_formatted = "\n".join(quote_lines)
+    quote_formatted = _format_quote(quote) if quote else None
 
     # Apply regex links to message
-    linked_msg = _apply_regex_links(msg.strip()) if msg else None
+    linked_msg = _apply_regex_links(stripped) if msg else None
 
     content = render_report(
         fileid=fileid,
         group_title=group_title,
         group_id=group_id,
-        tnr=dt.strftime("%d%H%M"),
-        timestamp_iso=dt.isoformat(),
+        tnr=tnr,
+        timestamp_iso=timestamp_iso,
         sender_display=sender_display,
         sender_name=source_name,
         sender_number=source_number,
@@ -362,8 +425,15 @@ async def process_message(obj: dict[str, Any], reader: asyncio.StreamReader, wri
     )
 
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(content)
+        try:
+            await asyncio.to_thread(_write_markdown, path, content)
+        except FileNotFoundError:
+            # The group folder was removed while we were running; recreate it and retry once.
+            _ensured_dirs.discard(group_dir)
+            _ensure_group_dir(group_dir)
+            await asyncio.to_thread(_write_markdown, path, content)
+        remember_written_file(path, dt, source_name, source_number)
         logger.info(f"WROTE: {path}")
     except OSError as e:
+        _ensured_dirs.discard(group_dir)
         logger.error(f"Failed to write file {path}: {e}")
@@ -10,12 +10,12 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import datetime
+import itertools
 import json
 import logging
 import sys
-import time
-import webbrowser
-from typing import TYPE_CHECKING
+from collections.abc import Coroutine
+from typing import TYPE_CHECKING, Any, TypeVar
 
 if TYPE_CHECKING:
     from oden.tray import OdenTray
@@ -34,13 +34,30 @@ from oden.config import (
     is_configured,
     reload_config,
 )
-from oden.log_buffer import get_log_buffer
+from oden.json_utils import dumps, dumps_line, loads
 from oden.log_utils import apply_log_level, read_log_level, write_log_level
 from oden.processing import process_message
 from oden.signal_manager import SignalManager, is_signal_cli_running
 
 logger = logging.getLogger(__name__)
 
+# JSON-RPC ids for watcher requests; unlike second-resolution timestamps these
+# never repeat within a process.
+_request_ids = itertools.count()
+
+
+def _next_id(prefix: str) -> str:
+    """Return a new JSON-RPC request id such as ``list-groups-3``."""
+    return f"{prefix}-{next(_request_ids)}"
+
+
+# Prefixes of the ids above; replies to these requests are not logged as unexpected data
+_INTERNAL_ID_PREFIXES = ("update-profile-", "startup-", "list-groups-")
+
+# The same ids as they appear in signal-cli's compact JSON, so those replies can
+# be dropped before they are parsed
+_INTERNAL_ID_MARKERS = tuple(b'"id":"' + prefix.encode() for prefix in _INTERNAL_ID_PREFIXES)
+
 
 def configure_logging() -> None:
     """Configure logging with console output, file output, and in-memory buffer.
@@ -49,42 +66,70 @@ def configure_logging() -> None:
     If the file doesn't exist (first run / setup), DEBUG is used so that all
     setup activity is captured. After setup completes, the configured level
     is written to the file and applied via apply_log_level().
+
+    All handlers sit behind a QueueHandler, so log calls on the event loop only
+    enqueue the record; a QueueListener thread does the console and disk writes
+    and the file rotation.
     """
-    from logging.handlers import RotatingFileHandler
+    import atexit
+    import queue
+    from logging.handlers import QueueHandler, QueueListener
     from pathlib import Path
 
+    from oden.log_buffer import get_log_buffer
+    from oden.log_handlers import BatchingRotatingFileHandler
+
     level = read_log_level()
 
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
 
     formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
 
     # Console handler
     console_handler = logging.StreamHandler()
     console_handler.setLevel(level)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    queued_handlers: list[logging.Handler] = [console_handler]
 
-    # File handler with rotation (5MB max, keep 3 backups)
+    # File handler with rotation (5MB max, keep 3 backups); records that arrive
+    # in a burst are written together
+    log_path = None
+    file_error = None
     if LOG_FILE:
         try:
             log_path = Path(LOG_FILE).expanduser()
             log_path.parent.mkdir(parents=True, exist_ok=True)
-            file_handler = RotatingFileHandler(log_path, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+            file_handler = BatchingRotatingFileHandler(
+                log_path, log_queue, maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8"
+            )
             file_handler.setLevel(level)
             file_handler.setFormatter(formatter)
-            root_logger.addHandler(file_handler)
-            root_logger.info(f"Logging to file: {log_path}")
+            queued_handlers.append(file_handler)
         except Exception as e:
-            root_logger.warning(f"Could not set up file logging: {e}")
+            log_path = None
+            file_error = e
 
     # In-memory log buffer for web GUI
     log_buffer = get_log_buffer()
     log_buffer.setLevel(level)
-    root_logger.addHandler(log_buffer)
+    queued_handlers.append(log_buffer)
 
-    root_logger.info(f"Logging initialized at {logging.getLevelName(level)} level")
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setLevel(level)
+    listener = QueueListener(log_queue, *queued_handlers, respect_handler_level=True)
+    # apply_log_level() follows this attribute to the handlers behind the queue
+    queue_handler.listener = listener  # type: ignore[attr-defined]
+    listener.start()
+    atexit.register(listener.stop)
+    root_logger.addHandler(queue_handler)
+
+    if log_path is not None:
+        root_logger.info("Logging to file: %s", log_path)
+    elif file_error is not None:
+        root_logger.warning("Could not set up file logging: %s", file_error)
+    root_logger.info("Logging initialized at %s level", logging.getLevelName(level))
 
 
 async def send_startup_message(writer: asyncio.StreamWriter, groups: list[dict] | None = None) -> None:
@@ -99,7 +144,8 @@ async def send_startup_message(writer: asyncio.StreamWriter, groups: list[dict]
     # Import config values dynamically to get post-reload values
     from oden import config as cfg
 
-    if cfg.STARTUP_MESSAGE == "off":
+    startup_mode = cfg.STARTUP_MESSAGE
+    if startup_mode == "off":
         logger.info("Startup message disabled (startup_message=off)")
         return
 
@@ -108,53 +154,66 @@ async def send_startup_message(writer: asyncio.StreamWriter, groups: list[dict]
     message = f"🚀 Oden v{__version__} started\n📅 {timestamp}"
 
     try:
-        if cfg.STARTUP_MESSAGE == "self":
+        if startup_mode == "self":
             # Send to self only
-            request_id = f"startup-{int(time.time())}"
+            signal_number = cfg.SIGNAL_NUMBER
+            request_id = _next_id("startup")
             json_request = {
                 "jsonrpc": "2.0",
                 "method": "send",
-                "params": {"recipient": [cfg.SIGNAL_NUMBER], "message": message},
+                "params": {"recipient": [signal_number], "message": message},
                 "id": request_id,
             }
-            logger.info(f"Sending startup message to {cfg.SIGNAL_NUMBER}...")
-            writer.write((json.dumps(json_request) + "\n").encode("utf-8"))
-            await writer.drain()
+            logger.info("Sending startup message to %s...", signal_number)
+            # A single small frame never fills the write buffer, so there is no
+            # backpressure to wait for
+            writer.write(dumps_line(json_request))
             logger.info("Startup message sent to self.")
 
-        elif cfg.STARTUP_MESSAGE == "all":
+        elif startup_mode == "all":
             if not groups:
                 logger.warning("No groups available for startup message (startup_message=all)")
                 return
 
-            # Filter out ignored groups
-            active_groups = [g for g in groups if g.get("name") not in cfg.IGNORED_GROUPS]
-            if not active_groups:
-                logger.info("No active groups to send startup message to (all groups ignored)")
-                return
+            # Only groupId and id differ between requests, so the rest of the frame
+            # (including the encoded message) is serialized once and spliced in.
+            frame_head = b'{"jsonrpc":"2.0","method":"send","params":{"groupId":'
+            frame_mid = b',"message":' + dumps(message) + b'},"id":'
+            # Filter ignored groups and build the frames in a single pass; every
+            # request is queued and drained once, so the sends are not serialized
+            # behind flow control one group at a time.
+            ignored_groups = cfg.IGNORED_GROUPS
+            active_count = 0
+            frames = []
+            sent_names = []
+            for group in groups:
+                group_name = group.get("name")
+                if group_name in ignored_groups:
+                    continue
+                active_count += 1
 
-            logger.info(f"Sending startup message to {len(active_groups)} group(s)...")
-            for group in active_groups:
                 group_id = group.get("id")
-                group_name = group.get("name", "Unknown")
                 if not group_id:
                     continue
 
-                request_id = f"startup-{group_id}-{int(time.time())}"
-                json_request = {
-                    "jsonrpc": "2.0",
-                    "method": "send",
-                    "params": {"groupId": group_id, "message": message},
-                    "id": request_id,
-                }
-                writer.write((json.dumps(json_request) + "\n").encode("utf-8"))
-                await writer.drain()
-                logger.info(f"  • Sent to group: {group_name}")
+                request_id = _next_id(f"startup-{group_id}")
+                frames.append(b"".join((frame_head, dumps(group_id), frame_mid, dumps(request_id), b"}\n")))
+                sent_names.append(group_name or "Unknown")
+
+            if not active_count:
+                logger.info("No active groups to send startup message to (all groups ignored)")
+                return
+
+            logger.info("Sending startup message to %d group(s)...", active_count)
+            writer.writelines(frames)
+            await writer.drain()
+            for group_name in sent_names:
+                logger.info("  • Sent to group: %s", group_name)
 
-            logger.info(f"Startup message sent to {len(active_groups)} group(s).")
+            logger.info("Startup message sent to %d group(s).", active_count)
 
     except Exception as e:
-        logger.error(f"ERROR sending startup message: {e}")
+        logger.error("ERROR sending startup message: %s", e)
 
 
 async def log_groups(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> list[dict]:
@@ -165,29 +224,56 @@ async def log_groups(reader: asyncio.StreamReader, writer: asyncio.StreamWriter)
     Returns:
         List of group dictionaries from signal-cli.
     """
+    # Messages arriving before the reply are processed once it is in: processing
+    # may fetch attachments, which reads from this same stream.
+    notifications: list[dict] = []
+    groups = await _request_groups(reader, writer, notifications)
+    for params in notifications:
+        try:
+            await process_message(params, reader, writer)
+        except Exception as e:
+            logger.error("Could not process message received during listGroups: %r", e)
+    return groups
+
+
+async def _request_groups(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, notifications: list[dict]
+) -> list[dict]:
+    """Sends listGroups and logs the reply, collecting receive params that arrive first."""
     from oden import config as cfg
 
     app_state = get_app_state()
-    request_id = f"list-groups-{int(time.time())}"
+    request_id = _next_id("list-groups")
     json_request = {
         "jsonrpc": "2.0",
         "method": "listGroups",
         "id": request_id,
     }
-    request_str = json.dumps(json_request) + "\n"
-
     try:
-        writer.write(request_str.encode("utf-8"))
+        writer.write(dumps_line(json_request))
         await writer.drain()
 
-        # Wait for response with timeout
-        response_line = await asyncio.wait_for(reader.readline(), timeout=10.0)
-        if not response_line:
-            logger.warning("No response received for listGroups request")
-            return []
+        # The reply shares the stream with incoming notifications, which may arrive
+        # first. Those are kept for the caller, not dropped.
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + 10.0
+        while True:
+            response_line = await asyncio.wait_for(reader.readline(), timeout=deadline - loop.time())
+            if not response_line:
+                logger.warning("No response received for listGroups request")
+                return []
+            if not response_line.strip():
+                continue
 
-        response = json.loads(response_line.decode("utf-8"))
-        if response.get("id") == request_id and "result" in response:
+            response = loads(response_line)
+            if response.get("id") == request_id:
+                break
+            if response.get("method") == "receive" and (params := response.get("params")):
+                notifications.append(params)
+            else:
+                logger.debug("Unexpected data while waiting for listGroups: %s", response)
+
+        if "result" in response:
             groups = response["result"]
             # Cache groups in app_state for web GUI access
             app_state.update_groups(groups)
@@ -196,27 +282,30 @@ async def log_groups(reader: asyncio.StreamReader, writer: asyncio.StreamWriter)
                 logger.info("No groups found for this account.")
                 return []
 
-            logger.info(f"Account is member of {len(groups)} group(s):")
+            ignored_groups = cfg.IGNORED_GROUPS
+            ignored_count = 0
+            logger.info("Account is member of %d group(s):", len(groups))
             for group in groups:
                 group_name = group.get("name", "Unknown")
-                is_ignored = group_name in cfg.IGNORED_GROUPS
-                status = " (IGNORED)" if is_ignored else ""
-                logger.info(f"  • {group_name}{status}")
+                if group_name in ignored_groups:
+                    ignored_count += 1
+                    logger.info("  • %s (IGNORED)", group_name)
+                else:
+                    logger.info("  • %s", group_name)
 
-            if cfg.IGNORED_GROUPS:
-                ignored_count = sum(1 for g in groups if g.get("name") in cfg.IGNORED_GROUPS)
-                logger.info(f"Ignored groups configured: {len(cfg.IGNORED_GROUPS)}, matched: {ignored_count}")
+            if ignored_groups:
+                logger.info("Ignored groups configured: %d, matched: %d", len(ignored_groups), ignored_count)
 
             return groups
         else:
-            logger.debug(f"Unexpected response for listGroups: {response}")
+            logger.debug("Unexpected response for listGroups: %s", response)
             return []
 
     except asyncio.TimeoutError:
         logger.warning("Timeout waiting for listGroups response")
         return []
     except Exception as e:
-        logger.error(f"ERROR fetching groups: {e}")
+        logger.error("ERROR fetching groups: %s", e)
         return []
 
 
@@ -225,29 +314,29 @@ async def update_profile(writer: asyncio.StreamWriter, display_name: str | None)
     if not display_name:
         return
 
-    request_id = f"update-profile-{int(time.time())}"
+    request_id = _next_id("update-profile")
     json_request = {
         "jsonrpc": "2.0",
         "method": "updateProfile",
         "params": {"name": display_name},
         "id": request_id,
     }
-    request_str = json.dumps(json_request) + "\n"
-
     try:
-        logger.info(f"Attempting to update profile name to '{display_name}'...")
-        writer.write(request_str.encode("utf-8"))
-        await writer.drain()
-        # Note: We are not waiting for a response here to avoid blocking.
-        # The update is "fire and forget".
+        logger.info("Attempting to update profile name to '%s'...", display_name)
+        writer.write(dumps_line(json_request))
+        # Note: We are not waiting for a response or draining here to avoid
+        # blocking. The update is "fire and forget"; a single small frame never
+        # fills the write buffer.
         logger.info("Profile name update request sent.")
     except Exception as e:
-        logger.error(f"ERROR sending updateProfile request: {e}")
+        logger.error("ERROR sending updateProfile request: %s", e)
 
 
 async def subscribe_and_listen(host: str, port: int) -> None:
     """Connects to signal-cli via TCP socket, subscribes to messages, and processes them."""
-    logger.info(f"Connecting to signal-cli at {host}:{port}...")
+    from oden import config as cfg
+
+    logger.info("Connecting to signal-cli at %s:%s...", host, port)
 
     reader = None
     writer = None
@@ -260,34 +349,60 @@ async def subscribe_and_listen(host: str, port: int) -> None:
         app_state.writer = writer
         app_state.reader = reader
 
-        await update_profile(writer, DISPLAY_NAME)
-        groups = await log_groups(reader, writer)
-        await send_startup_message(writer, groups)
+        # updateProfile is fire-and-forget and the startup message needs the group
+        # list only in "all" mode, so the independent requests go out concurrently.
+        profile_task = asyncio.create_task(update_profile(writer, DISPLAY_NAME))
+        if cfg.STARTUP_MESSAGE == "all":
+            groups = await log_groups(reader, writer)
+            await send_startup_message(writer, groups)
+        else:
+            await asyncio.gather(log_groups(reader, writer), send_startup_message(writer))
+        await profile_task
 
         while not reader.at_eof():
             line = await reader.readline()
             if not line:
                 break
 
-            message_str = line.decode("utf-8").strip()
-            if not message_str:
+            # Skip keepalive blank lines without copying; the JSON parser ignores the
+            # trailing newline, and the line is only decoded if it has to be logged
+            if line.isspace():
+                continue
+            # Replies are only logged at DEBUG, and replies to our own startup requests
+            # not at all, so those are dropped before parsing. Only a line without any
+            # "method" key can be a reply; anything else is parsed before deciding.
+            is_reply = b'"method"' not in line
+            if is_reply and any(marker in line for marker in _INTERNAL_ID_MARKERS):
+                continue
+            if is_reply and b'"id"' in line and not logger.isEnabledFor(logging.DEBUG):
                 continue
 
             try:
-                data = json.loads(message_str)
-                if data.get("method") == "receive" and (params := data.get("params")):
-                    await process_message(params, reader, writer)
-                else:
-                    # Log other responses if they are not the response to our updateProfile request
-                    if not (isinstance(data, dict) and data.get("id", "").startswith("update-profile-")):
-                        logger.debug(f"Received non-message data: {data}")
+                data = loads(line)
             except json.JSONDecodeError:
-                logger.error(f"Received non-JSON message: {message_str}")
-            except Exception as e:
-                logger.error(f"Could not process message.\n  Error: {repr(e)}\n  Message: {message_str}")
+                logger.error("Received non-JSON message: %s", line.strip().decode("utf-8", "replace"))
+                continue
+            if not isinstance(data, dict):
+                logger.debug("Received non-message data: %s", data)
+                continue
+
+            if data.get("method") == "receive" and (params := data.get("params")):
+                # Only message processing can fail here; one bad message must not
+                # end the connection
+                try:
+                    await process_message(params, reader, writer)
+                except Exception as e:
+                    message_str = line.strip().decode("utf-8", "replace")
+                    logger.error("Could not process message.\n  Error: %r\n  Message: %s", e, message_str)
+                continue
+
+            # Log other responses unless they answer one of our own startup requests
+            request_id = data.get("id")
+            if not (isinstance(request_id, str) and request_id.startswith(_INTERNAL_ID_PREFIXES)):
+                logger.debug("Received non-message data: %s", data)
 
     except ConnectionRefusedError as e:
-        logger.error(f"Connection to signal-cli daemon failed: {e}")
+        logger.error("Connection to signal-cli daemon failed: %s", e)
         logger.error("Please ensure signal-cli is running in JSON-RPC mode with a TCP socket.")
         raise
     finally:
@@ -332,7 +447,7 @@ async def _run_lifecycle(
     web_runner = None
     if WEB_ENABLED:
         web_runner = await start_web_server(WEB_PORT)
-        logger.info(f"Web GUI enabled on port {WEB_PORT}")
+        logger.info("Web GUI enabled on port %s", WEB_PORT)
 
     listener_task: asyncio.Task | None = None
 
@@ -462,18 +577,21 @@ async def run_setup_mode(port: int) -> bool:
     logger.info("Oden är inte konfigurerad ännu.")
     logger.info("En webbläsare öppnas nu för att guida dig genom setup.")
     logger.info("")
-    logger.info(f"Om webbläsaren inte öppnas, gå till: http://127.0.0.1:{port}/setup")
+    logger.info("Om webbläsaren inte öppnas, gå till: http://127.0.0.1:%s/setup", port)
     logger.info("")
 
     # Open browser after a short delay
     async def open_browser():
+        import webbrowser
+
         await asyncio.sleep(1.0)
         url = f"http://127.0.0.1:{port}/setup"
         try:
-            webbrowser.open(url)
-            logger.info(f"Öppnade webbläsare: {url}")
+            # webbrowser.open may spawn a process synchronously; keep it off the loop
+            await asyncio.to_thread(webbrowser.open, url)
+            logger.info("Öppnade webbläsare: %s", url)
         except Exception as e:
-            logger.warning(f"Kunde inte öppna webbläsare: {e}")
+            logger.warning("Kunde inte öppna webbläsare: %s", e)
 
     # Run web server and browser opener concurrently
     browser_task = asyncio.create_task(open_browser())
@@ -483,6 +601,19 @@ async def run_setup_mode(port: int) -> bool:
     return result
 
 
+_T = TypeVar("_T")
+
+
+def _run_event_loop(main: Coroutine[Any, Any, _T]) -> _T:
+    """Runs main like asyncio.run(), on uvloop's event loop if the optional dependency is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main)
+    logger.debug("Using uvloop event loop")
+    return uvloop.run(main)
+
+
 def main() -> None:
     """Sets up the vault path, starts signal-cli, and begins listening.
 
@@ -497,14 +628,14 @@ def main() -> None:
     # Configure logging with console and buffer handlers
     configure_logging()
 
-    logger.info(f"Starting Oden v{__version__}...")
+    logger.info("Starting Oden v%s...", __version__)
 
     # Check if this is first run (not configured)
     _is_configured, _config_error = is_configured()
     if not _is_configured:
-        logger.info(f"First run detected ({_config_error}) - starting setup wizard...")
+        logger.info("First run detected (%s) - starting setup wizard...", _config_error)
         try:
-            setup_complete = asyncio.run(run_setup_mode(WEB_PORT))
+            setup_complete = _run_event_loop(run_setup_mode(WEB_PORT))
             if setup_complete:
                 logger.info("Setup complete! Reloading configuration...")
                 # Reload and get fresh config values
@@ -524,7 +655,7 @@ def main() -> None:
             logger.info("Setup cancelled by user.")
             sys.exit(0)
         except Exception as e:
-            logger.exception(f"Error during setup: {e}")
+            logger.exception("Error during setup: %s", e)
             sys.exit(1)
     else:
         # Use existing config
@@ -557,7 +688,7 @@ def main() -> None:
     def _watcher_loop() -> None:
         """Run the async lifecycle (may be called from a background thread)."""
         try:
-            asyncio.run(
+            _run_event_loop(
                 _run_lifecycle(
                     host=new_host,
                     port=new_port,
@@ -568,7 +699,7 @@ def main() -> None:
         except (KeyboardInterrupt, SystemExit):
             logger.info("Watcher loop stopped.")
         except Exception as e:
-            logger.exception(f"An unexpected error occurred: {e}")
+            logger.exception("An unexpected error occurred: %s", e)
         finally:
             if tray is not None:
                 tray.stop()
@@ -7,17 +7,23 @@ Supports bundled JRE and signal-cli for macOS .app distribution.
 
 import asyncio
 import contextlib
+import functools
+import json
 import logging
 import os
 import shutil
 import socket
 import subprocess
 import sys
+import threading
 import time
+from collections import deque
 from pathlib import Path
+from typing import Any
 
 from oden.bundle_utils import get_bundle_path, get_bundled_java_path, is_bundled
 from oden.config import SIGNAL_CLI_LOG_FILE, SIGNAL_CLI_PATH, SIGNAL_DATA_PATH
+from oden.json_utils import loads
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +45,16 @@ def get_bundled_signal_cli_path() -> str | None:
 
 
 def get_signal_cli_env() -> dict:
-    """Get environment variables for running signal-cli with bundled JRE."""
+    """Get environment variables for running signal-cli with bundled JRE.
+
+    The environment is built once per process; each caller gets its own copy.
+    """
+    return dict(_build_signal_cli_env())
+
+
+@functools.cache
+def _build_signal_cli_env() -> dict:
+    """Builds the signal-cli environment for get_signal_cli_env."""
     env = os.environ.copy()
 
     # Set JAVA_HOME if bundled JRE is available
@@ -57,15 +72,88 @@ def get_signal_cli_env() -> dict:
     return env
 
 
+# How long a successful reachability probe is trusted without connecting again
+_RUNNING_PROBE_TTL = 1.0
+
+# (host, port) -> time.monotonic() of the last successful probe
+_last_seen_running: dict[tuple[str, int], float] = {}
+
+
 def is_signal_cli_running(host: str, port: int) -> bool:
-    """Checks if the signal-cli RPC server is reachable."""
+    """Checks if the signal-cli RPC server is reachable.
+
+    A positive result is reused for _RUNNING_PROBE_TTL seconds, so back-to-back
+    checks do not open a new connection each time.
+    """
+    key = (host, port)
+    seen_at = _last_seen_running.get(key)
+    if seen_at is not None and time.monotonic() - seen_at < _RUNNING_PROBE_TTL:
+        return True
+
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         try:
             s.settimeout(1)
             s.connect((host, port))
-            return True
         except (OSError, ConnectionRefusedError):
+            _last_seen_running.pop(key, None)
             return False
+    _last_seen_running[key] = time.monotonic()
+    return True
+
+
+@functools.lru_cache(maxsize=4)
+def _find_signal_cli(configured_path: str | None) -> str:
+    """Finds the signal-cli executable.
+
+    The result only depends on the configured path and the installation, so it
+    is cached; a failed lookup raises and is retried on the next call.
+    """
+    # First check for bundled signal-cli (PyInstaller)
+    bundled = get_bundled_signal_cli_path()
+    if bundled:
+        return bundled
+
+    if configured_path:
+        if os.path.isfile(configured_path):
+            logger.info(f"Found signal-cli from config: {configured_path}")
+            return configured_path
+        else:
+            logger.warning(f"Configured signal_cli_path '{configured_path}' does not exist.")
+
+    if path := shutil.which("signal-cli"):
+        logger.info(f"Found signal-cli in PATH: {path}")
+        return path
+
+    # Check for signal-cli in project directory (development)
+    bundled_path = "./signal-cli-0.13.23/bin/signal-cli"
+    if os.path.isfile(bundled_path):
+        logger.info(f"Found bundled signal-cli: {bundled_path}")
+        return os.path.abspath(bundled_path)
+
+    # Also check older version
+    bundled_path_old = "./signal-cli-0.13.22/bin/signal-cli"
+    if os.path.isfile(bundled_path_old):
+        logger.info(f"Found bundled signal-cli: {bundled_path_old}")
+        return os.path.abspath(bundled_path_old)
+
+    raise FileNotFoundError(
+        "signal-cli executable not found. Please install it, place it in the project directory, or configure 'signal_cli_path' in config.ini."
+    )
+
+
+# Number of signal-cli output lines kept for error reporting
+_OUTPUT_TAIL_LINES = 200
+
+
+def _drain_output(stream: Any, tail: deque[bytes], ready: threading.Event) -> None:
+    """Reads signal-cli output until EOF, keeping the last lines in tail.
+
+    Sets ready when the stream closes, so the startup poll notices an exited
+    daemon right away. Reading the pipe continuously also keeps a chatty daemon
+    from blocking on a full pipe.
+    """
+    tail.extend(iter(stream.readline, b""))
+    ready.set()
 
 
 class SignalManager:
@@ -79,40 +167,13 @@ class SignalManager:
         self.executable = self._find_executable()
         self.log_file_handle = None
         self.env = get_signal_cli_env()
+        self._stdout_tail: deque[bytes] = deque(maxlen=_OUTPUT_TAIL_LINES)
+        self._stderr_tail: deque[bytes] = deque(maxlen=_OUTPUT_TAIL_LINES)
+        self._output_threads: list[threading.Thread] = []
 
     def _find_executable(self) -> str:
         """Finds the signal-cli executable."""
-        # First check for bundled signal-cli (PyInstaller)
-        bundled = get_bundled_signal_cli_path()
-        if bundled:
-            return bundled
-
-        if SIGNAL_CLI_PATH:
-            if os.path.exists(SIGNAL_CLI_PATH):
-                logger.info(f"Found signal-cli from config: {SIGNAL_CLI_PATH}")
-                return SIGNAL_CLI_PATH
-            else:
-                logger.warning(f"Configured signal_cli_path '{SIGNAL_CLI_PATH}' does not exist.")
-
-        if path := shutil.which("signal-cli"):
-            logger.info(f"Found signal-cli in PATH: {path}")
-            return path
-
-        # Check for signal-cli in project directory (development)
-        bundled_path = "./signal-cli-0.13.23/bin/signal-cli"
-        if os.path.exists(bundled_path):
-            logger.info(f"Found bundled signal-cli: {bundled_path}")
-            return os.path.abspath(bundled_path)
-
-        # Also check older version
-        bundled_path_old = "./signal-cli-0.13.22/bin/signal-cli"
-        if os.path.exists(bundled_path_old):
-            logger.info(f"Found bundled signal-cli: {bundled_path_old}")
-            return os.path.abspath(bundled_path_old)
-
-        raise FileNotFoundError(
-            "signal-cli executable not found. Please install it, place it in the project directory, or configure 'signal_cli_path' in config.ini."
-        )
+        return _find_signal_cli(SIGNAL_CLI_PATH)
 
     def start(self) -> None:
         """Starts the signal-cli daemon."""
@@ -149,28 +210,62 @@ class SignalManager:
 
         self.process = subprocess.Popen(command, stdout=stdout_target, stderr=stderr_target, env=self.env)
 
-        # Poll for up to 15 seconds for the daemon to start
-        for _ in range(15):
+        # With pipes, both streams are read continuously into bounded tails, and
+        # the poll below wakes up as soon as the daemon exits
+        ready = threading.Event()
+        self._output_threads = []
+        if stdout_target == subprocess.PIPE:
+            for name, stream, tail in (
+                ("stdout", self.process.stdout, self._stdout_tail),
+                ("stderr", self.process.stderr, self._stderr_tail),
+            ):
+                tail.clear()
+                thread = threading.Thread(
+                    target=_drain_output, args=(stream, tail, ready), name=f"signal-cli-{name}", daemon=True
+                )
+                thread.start()
+                self._output_threads.append(thread)
+
+        # Poll for up to 15 seconds for the daemon to start, backing off from 25 ms
+        # to 500 ms between probes; give up early if the daemon exits
+        deadline = time.monotonic() + 15
+        delay = 0.025
+        while time.monotonic() < deadline:
             if is_signal_cli_running(self.host, self.port):
                 logger.info("signal-cli started successfully.")
                 return
-            time.sleep(1)
-
-        # If it's still not running, get output and raise error
+            if self.process.poll() is not None:
+                logger.error(f"signal-cli exited with code {self.process.returncode} during startup.")
+                break
+            if ready.wait(delay):
+                ready.clear()
+            delay = min(delay * 2, 0.5)
+
+        # If it's still not running, get output and raise error. The reader
+        # threads end once the process is gone, and only the last lines of each
+        # stream were kept.
         self.process.kill()
-        # Only try to communicate if pipes were used
+        self.process.wait()
+        self._join_output_threads()
         if stdout_target == subprocess.PIPE:
-            stdout, stderr = self.process.communicate()
-            logger.error("Failed to start signal-cli daemon within 15 seconds.")
+            stdout = b"".join(self._stdout_tail)
+            stderr = b"".join(self._stderr_tail)
+            logger.error("Failed to start signal-cli daemon.")
             if stdout:
-                logger.error(f"Stdout: {stdout.decode()}")
+                logger.error(f"Stdout: {stdout.decode(errors='replace')}")
             if stderr:
-                logger.error(f"Stderr: {stderr.decode()}")
+                logger.error(f"Stderr: {stderr.decode(errors='replace')}")
         else:
-            logger.error("Failed to start signal-cli daemon within 15 seconds. Check log file for details.")
+            logger.error("Failed to start signal-cli daemon. Check log file for details.")
 
         raise RuntimeError("Could not start signal-cli.")
 
+    def _join_output_threads(self) -> None:
+        """Waits for the output reader threads, which end when the process exits."""
+        for thread in self._output_threads:
+            thread.join(timeout=5)
+        self._output_threads = []
+
     def stop(self) -> None:
         """Stops the signal-cli daemon."""
         if self.process:
@@ -182,23 +277,29 @@ class SignalManager:
                 logger.warning("signal-cli did not terminate gracefully, killing.")
                 self.process.kill()
             self.process = None
+            self._join_output_threads()
+            _last_seen_running.pop((self.host, self.port), None)
             logger.info("signal-cli stopped.")
         if self.log_file_handle:
             self.log_file_handle.close()
             self.log_file_handle = None
 
 
+# accounts.json path -> (st_mtime_ns, account numbers in file order)
+_accounts_cache: dict[Path, tuple[int, list[str]]] = {}
+
+
 def get_existing_accounts() -> list[dict]:
     """Find existing Signal accounts by reading accounts.json directly.
 
     This is much faster than running signal-cli listAccounts (no JVM startup).
+    Each accounts.json is only parsed again when its modification time changes.
 
     Returns:
         List of dicts with 'number' key for each account.
     """
-    import json as json_module
-
     accounts = []
+    seen_numbers: set[str] = set()
 
     # Check standard signal-cli data locations
     data_paths = []
@@ -214,22 +315,34 @@ def get_existing_accounts() -> list[dict]:
     # Also check our custom location
     data_paths.append(SIGNAL_DATA_PATH)
 
-    logger.debug(f"Searching for Signal accounts in: {data_paths}")
+    logger.debug("Searching for Signal accounts in: %s", data_paths)
 
     for data_path in data_paths:
         accounts_file = data_path / "data" / "accounts.json"
-        logger.debug(f"Checking {accounts_file} (exists: {accounts_file.exists()})")
-        if accounts_file.exists():
+        try:
+            mtime_ns = accounts_file.stat().st_mtime_ns
+        except OSError:
+            logger.debug("Checking %s (exists: False)", accounts_file)
+            continue
+        logger.debug("Checking %s (exists: True)", accounts_file)
+
+        cached = _accounts_cache.get(accounts_file)
+        if cached is not None and cached[0] == mtime_ns:
+            numbers = cached[1]
+        else:
             try:
-                with open(accounts_file) as f:
-                    data = json_module.load(f)
-                    for acc in data.get("accounts", []):
-                        number = acc.get("number")
-                        if number and not any(a["number"] == number for a in accounts):
-                            accounts.append({"number": number})
-                logger.info(f"Found {len(accounts)} accounts in {accounts_file}")
-            except (json_module.JSONDecodeError, OSError, KeyError) as e:
+                data = loads(accounts_file.read_bytes())
+                numbers = [number for acc in data.get("accounts", []) if (number := acc.get("number"))]
+            except (json.JSONDecodeError, OSError, KeyError) as e:
                 logger.warning(f"Error reading {accounts_file}: {e}")
+                continue
+            _accounts_cache[accounts_file] = (mtime_ns, numbers)
+
+        for number in numbers:
+            if number not in seen_numbers:
+                seen_numbers.add(number)
+                accounts.append({"number": number})
+        logger.info(f"Found {len(accounts)} accounts in {accounts_file}")
 
     logger.info(f"Total accounts found: {len(accounts)}")
     return accounts
@@ -250,23 +363,7 @@ class SignalLinker:
 
     def _find_executable(self) -> str:
         """Finds the signal-cli executable."""
-        bundled = get_bundled_signal_cli_path()
-        if bundled:
-            return bundled
-
-        if SIGNAL_CLI_PATH and os.path.exists(SIGNAL_CLI_PATH):
-            return SIGNAL_CLI_PATH
-
-        if path := shutil.which("signal-cli"):
-            return path
-
-        # Check for signal-cli in project directory
-        for version in ["0.13.23", "0.13.22"]:
-            bundled_path = f"./signal-cli-{version}/bin/signal-cli"
-            if os.path.exists(bundled_path):
-                return os.path.abspath(bundled_path)
-
-        raise FileNotFoundError("signal-cli executable not found.")
+        return _find_signal_cli(SIGNAL_CLI_PATH)
 
     async def start_link(self) -> str | None:
         """Start the linking process and return the device link URI.
@@ -424,23 +521,7 @@ class SignalRegistrar:
 
     def _find_executable(self) -> str:
         """Finds the signal-cli executable."""
-        bundled = get_bundled_signal_cli_path()
-        if bundled:
-            return bundled
-
-        if SIGNAL_CLI_PATH and os.path.exists(SIGNAL_CLI_PATH):
-            return SIGNAL_CLI_PATH
-
-        if path := shutil.which("signal-cli"):
-            return path
-
-        # Check for signal-cli in project directory
-        for version in ["0.13.23", "0.13.22"]:
-            bundled_path = f"./signal-cli-{version}/bin/signal-cli"
-            if os.path.exists(bundled_path):
-                return os.path.abspath(bundled_path)
-
-        raise FileNotFoundError("signal-cli executable not found.")
+        return _find_signal_cli(SIGNAL_CLI_PATH)
 
     async def start_register(
         self, phone_number: str, use_voice: bool = False, captcha_token: str | None = None
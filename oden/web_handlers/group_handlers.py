@@ -30,7 +30,12 @@ async def groups_handler(request: web.Request) -> web.Response:
                 }
             )
     return web.json_response(
-        {"groups": groups, "ignoredGroups": cfg.IGNORED_GROUPS, "whitelistGroups": cfg.WHITELIST_GROUPS}
+        {
+            "groups": groups,
+            # Group lists are frozensets in config; sort them for a stable JSON array
+            "ignoredGroups": sorted(cfg.IGNORED_GROUPS),
+            "whitelistGroups": sorted(cfg.WHITELIST_GROUPS),
+        }
     )
 
 
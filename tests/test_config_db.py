@@ -4,6 +4,7 @@ import tempfile
 import unittest
 from pathlib import Path
 
+from oden import config_db
 from oden.config_db import (
     create_response,
     delete_response,
@@ -114,6 +115,23 @@ class TestResponsesCRUD(unittest.TestCase):
         body = get_response_by_keyword(self.db_path, "todelete")
         self.assertIsNone(body)
 
+    def test_get_response_by_keyword_cache_invalidated_on_save(self):
+        """Cached keyword lookups (hits and misses) must not survive an update."""
+        new_id = create_response(self.db_path, ["cached"], "First body")
+        self.assertEqual(get_response_by_keyword(self.db_path, "cached"), "First body")
+        self.assertIsNone(get_response_by_keyword(self.db_path, "renamed"))
+
+        save_response(self.db_path, new_id, ["renamed"], "Second body")
+        self.assertIsNone(get_response_by_keyword(self.db_path, "cached"))
+        self.assertEqual(get_response_by_keyword(self.db_path, "renamed"), "Second body")
+
+    def test_get_response_by_keyword_cache_bounded_by_table(self):
+        """Unknown keywords are not remembered, so the cache only holds the table's keywords."""
+        for i in range(50):
+            self.assertIsNone(get_response_by_keyword(self.db_path, f"unknown{i}"))
+        self.assertEqual(get_response_by_keyword(self.db_path, "ok"), "Mottaget.")
+        self.assertEqual(set(config_db._response_cache[self.db_path][1]), {"help", "hjälp", "ok"})
+
     def test_delete_response_nonexistent_id(self):
         """Deleting a non-existent id should return False."""
         success = delete_response(self.db_path, 99999)
@@ -1,18 +1,22 @@
 import datetime
 import os
 import tempfile
+import time
 import unittest
 from unittest.mock import patch
 
+from oden import formatting
 from oden.formatting import (
     _format_phone_number,
     _format_quote,
     create_fileid,
     create_message_filename,
+    find_latest_file_by_fileid,
     format_sender_display,
     get_message_filepath,
     get_safe_group_dir_path,
     get_unique_filename,
+    remember_written_file,
 )
 
 
@@ -93,6 +97,146 @@ class TestFormatting(unittest.TestCase):
             # Second file should get -1 suffix
             self.assertEqual(get_unique_filename(tmpdir, "181030-Nicklas.md"), "181030-Nicklas-1.md")
 
+    @patch("oden.config.APPEND_WINDOW_MINUTES", 30)
+    @patch("oden.config.TIMEZONE", datetime.timezone.utc)
+    def test_find_latest_file_by_fileid_window(self):
+        """Only files whose TNR falls inside the append window are candidates."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        recent = (now - datetime.timedelta(minutes=5)).strftime("%d%H%M")
+        older = (now - datetime.timedelta(minutes=10)).strftime("%d%H%M")
+        expired = (now - datetime.timedelta(minutes=45)).strftime("%d%H%M")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for tnr in (recent, older, expired):
+                with open(os.path.join(tmpdir, f"{tnr}.md"), "w", encoding="utf-8") as f:
+                    f.write(f"---\nfileid: {tnr}-123-John_Doe\n---\n")
+            # Classic filename without frontmatter falls back to the filename TNR
+            open(os.path.join(tmpdir, f"{expired}-123-John_Doe.md"), "w").close()
+
+            self.assertEqual(
+                find_latest_file_by_fileid(tmpdir, "John Doe", "+123"), os.path.join(tmpdir, f"{recent}.md")
+            )
+            self.assertIsNone(find_latest_file_by_fileid(tmpdir, "Jane Doe", "+456"))
+
+            os.remove(os.path.join(tmpdir, f"{recent}.md"))
+            os.remove(os.path.join(tmpdir, f"{older}.md"))
+            self.assertIsNone(find_latest_file_by_fileid(tmpdir, "John Doe", "+123"))
+
+    @patch("oden.config.APPEND_WINDOW_MINUTES", 30)
+    @patch("oden.config.TIMEZONE", datetime.timezone.utc)
+    def test_find_latest_file_by_fileid_uses_remembered_write(self):
+        """A report written by this process is found without scanning the directory."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, f"{now:%d%H%M}.md")
+            open(path, "w").close()
+            remember_written_file(path, now, "John Doe", "+123")
+
+            with patch("os.scandir", side_effect=AssertionError("directory scanned")):
+                self.assertEqual(find_latest_file_by_fileid(tmpdir, "John Doe", "+123"), path)
+                # Reply appends look the quoted author up by number only
+                self.assertEqual(find_latest_file_by_fileid(tmpdir, None, "+123"), path)
+
+            # A removed file is forgotten and the directory is scanned instead
+            os.remove(path)
+            self.assertIsNone(find_latest_file_by_fileid(tmpdir, "John Doe", "+123"))
+
+    @patch("oden.config.APPEND_WINDOW_MINUTES", 30)
+    @patch("oden.config.TIMEZONE", datetime.timezone.utc)
+    def test_find_latest_file_by_fileid_remembered_write_uses_scan_window(self):
+        """A remembered report follows the same minute window as a directory scan."""
+        written = datetime.datetime(2025, 12, 16, 12, 0, 50, tzinfo=datetime.timezone.utc)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "161200-123-John_Doe.md")
+            open(path, "w").close()
+            remember_written_file(path, written, "John Doe", "+123")
+
+            # Less than 30 minutes later, but the 12:00 minute is already outside the window
+            now = written.replace(minute=30, second=10)
+            self.assertIsNone(find_latest_file_by_fileid(tmpdir, "John Doe", "+123", now=now))
+
+            # A report dated after now is not returned either
+            remember_written_file(path, written, "John Doe", "+123")
+            before = written - datetime.timedelta(minutes=2)
+            self.assertIsNone(find_latest_file_by_fileid(tmpdir, "John Doe", "+123", now=before))
+            self.assertEqual(find_latest_file_by_fileid(tmpdir, "John Doe", "+123", now=written), path)
+
+    @patch("oden.config.APPEND_WINDOW_MINUTES", 30)
+    @patch("oden.config.TIMEZONE", datetime.timezone.utc)
+    def test_find_latest_file_by_fileid_skips_reading_expired_files(self):
+        """Files whose filename TNR is outside the window are never opened."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        recent = (now - datetime.timedelta(minutes=5)).strftime("%d%H%M")
+        expired = (now - datetime.timedelta(minutes=45)).strftime("%d%H%M")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for tnr in (recent, expired):
+                with open(os.path.join(tmpdir, f"{tnr}.md"), "w", encoding="utf-8") as f:
+                    f.write(f"---\nfileid: {tnr}-123-John_Doe\n---\n")
+
+            with patch("oden.formatting._extract_fileid_from_file", return_value=f"{recent}-123-John_Doe") as read:
+                find_latest_file_by_fileid(tmpdir, "John Doe", "+123")
+            read.assert_called_once_with(os.path.join(tmpdir, f"{recent}.md"))
+
+    @patch("oden.config.APPEND_WINDOW_MINUTES", 30)
+    @patch("oden.config.TIMEZONE", datetime.timezone.utc)
+    def test_find_latest_file_by_fileid_cached_until_directory_changes(self):
+        """An unchanged group directory is not listed again; a new file invalidates the cache."""
+        now = datetime.datetime.now(datetime.timezone.utc)
+        first = (now - datetime.timedelta(minutes=10)).strftime("%d%H%M")
+        second = (now - datetime.timedelta(minutes=5)).strftime("%d%H%M")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            open(os.path.join(tmpdir, f"{first}-123-John_Doe.md"), "w").close()
+            # Backdate the directory so it is old enough to be cached
+            old = time.time() - 60
+            os.utime(tmpdir, (old, old))
+
+            expected = os.path.join(tmpdir, f"{first}-123-John_Doe.md")
+            self.assertEqual(find_latest_file_by_fileid(tmpdir, "John Doe", "+123", now=now), expected)
+            with patch("os.scandir", side_effect=AssertionError("directory listed again")):
+                self.assertEqual(find_latest_file_by_fileid(tmpdir, "John Doe", "+123", now=now), expected)
+
+            open(os.path.join(tmpdir, f"{second}-123-John_Doe.md"), "w").close()
+            self.assertEqual(
+                find_latest_file_by_fileid(tmpdir, "John Doe", "+123", now=now),
+                os.path.join(tmpdir, f"{second}-123-John_Doe.md"),
+            )
+
+    @patch("oden.config.APPEND_WINDOW_MINUTES", 30)
+    @patch("oden.config.TIMEZONE", datetime.timezone.utc)
+    def test_find_latest_file_by_fileid_cache_follows_the_minute(self):
+        """A report dated after the cached minute is picked up once that minute arrives."""
+        now = datetime.datetime(2025, 12, 16, 12, 0, 30, tzinfo=datetime.timezone.utc)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            open(os.path.join(tmpdir, "161150-123-John_Doe.md"), "w").close()
+            open(os.path.join(tmpdir, "161201-123-John_Doe.md"), "w").close()
+            old = time.time() - 60
+            os.utime(tmpdir, (old, old))
+
+            self.assertEqual(
+                find_latest_file_by_fileid(tmpdir, "John Doe", "+123", now=now),
+                os.path.join(tmpdir, "161150-123-John_Doe.md"),
+            )
+            later = now + datetime.timedelta(minutes=1)
+            self.assertEqual(
+                find_latest_file_by_fileid(tmpdir, "John Doe", "+123", now=later),
+                os.path.join(tmpdir, "161201-123-John_Doe.md"),
+            )
+
+    @patch("oden.config.APPEND_WINDOW_MINUTES", 30)
+    @patch("oden.config.TIMEZONE", datetime.timezone.utc)
+    @patch("oden.formatting._LATEST_FILE_CACHE_MAX", 2)
+    def test_find_latest_file_by_fileid_cache_is_bounded(self):
+        """The oldest cached result is evicted once the cache is full."""
+        now = datetime.datetime(2025, 12, 16, 12, 0, tzinfo=datetime.timezone.utc)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            old = time.time() - 60
+            os.utime(tmpdir, (old, old))
+            for number in ("+1", "+2", "+3"):
+                find_latest_file_by_fileid(tmpdir, None, number, now=now)
+            self.assertEqual(
+                [key[1] for key in formatting._latest_file_cache if key[0] == tmpdir],
+                ["2", "3"],
+            )
+
     def test_format_sender_display(self):
         self.assertEqual(format_sender_display("John Doe", "+123"), "John Doe ( [[+123]])")
         self.assertEqual(format_sender_display("Jane Doe", None), "Jane Doe")
@@ -139,6 +283,7 @@ class TestFormatting(unittest.TestCase):
         formatted_multiline = _format_quote(quote_multiline)
         self.assertIn("> Line 1", formatted_multiline)
         self.assertIn("> Line 2", formatted_multiline)
+        self.assertEqual(formatted_multiline, "> **Svarar på Jane Doe ( [[+456]]):**\n> Line 1\n> Line 2")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+"""Tests for the log_handlers module."""
+
+import logging
+import queue
+import tempfile
+from pathlib import Path
+
+from oden.log_handlers import BatchingRotatingFileHandler
+
+
+def _record(msg: str) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, msg, None, None)
+
+
+class TestBatchingRotatingFileHandler:
+    """Tests for BatchingRotatingFileHandler."""
+
+    def test_writes_immediately_when_queue_is_empty(self):
+        """A record is written as soon as no further records are pending."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "oden.log"
+            handler = BatchingRotatingFileHandler(path, queue.SimpleQueue(), encoding="utf-8")
+            try:
+                handler.emit(_record("first"))
+                assert path.read_text(encoding="utf-8") == "first\n"
+            finally:
+                handler.close()
+
+    def test_batches_while_records_are_pending(self):
+        """Records are held back while more are queued and written on close."""
+        pending = queue.SimpleQueue()
+        pending.put(object())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "oden.log"
+            handler = BatchingRotatingFileHandler(path, pending, batch_size=3, encoding="utf-8")
+            handler.emit(_record("one"))
+            handler.emit(_record("two"))
+            assert path.read_text(encoding="utf-8") == ""
+
+            handler.emit(_record("three"))
+            assert path.read_text(encoding="utf-8") == "one\ntwo\nthree\n"
+
+            handler.emit(_record("four"))
+            handler.close()
+            assert path.read_text(encoding="utf-8").endswith("three\nfour\n")
+
+    def test_rolls_over_before_exceeding_max_bytes(self):
+        """A batch that would exceed maxBytes starts a new file."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "oden.log"
+            handler = BatchingRotatingFileHandler(path, queue.SimpleQueue(), maxBytes=10, backupCount=1)
+            try:
+                handler.emit(_record("123456"))
+                handler.emit(_record("abcdef"))
+            finally:
+                handler.close()
+            assert path.read_text() == "abcdef\n"
+            assert Path(f"{path}.1").read_text() == "123456\n"
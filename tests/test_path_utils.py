@@ -72,6 +72,16 @@ class TestIsWithinDirectory:
         path = Path("/home/user/other")
         assert is_within_directory(path, parent) is False
 
+    def test_sibling_with_common_prefix(self):
+        """Test that a sibling sharing the parent's name as prefix is rejected."""
+        parent = Path("/home/user")
+        path = Path("/home/username/file.txt")
+        assert is_within_directory(path, parent) is False
+
+    def test_path_within_root(self):
+        """Test that any absolute path is within the filesystem root."""
+        assert is_within_directory(Path("/etc/passwd"), Path("/")) is True
+
 
 class TestIsFilesystemRoot:
     """Tests for is_filesystem_root function."""
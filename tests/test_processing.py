@@ -1,19 +1,26 @@
 import datetime
+import json
 import os
 import unittest
-from unittest.mock import AsyncMock, mock_open, patch
+from unittest.mock import AsyncMock, MagicMock, mock_open, patch
 
-from oden.processing import _extract_message_details, extract_coordinates, process_message
+from oden import formatting, processing
+from oden.processing import _extract_message_details, _send_reply, extract_coordinates, process_message
 
 
 class TestProcessing(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        processing._ensured_dirs.clear()
+        formatting._recent_files.clear()
+
     def test_extract_message_details_data_message(self):
         envelope = {"dataMessage": {"message": "Hello", "groupV2": {"name": "Test Group", "id": "group123"}}}
-        msg, group_title, group_id, attachments = _extract_message_details(envelope)
+        msg, group_title, group_id, attachments, quote = _extract_message_details(envelope)
         self.assertEqual(msg, "Hello")
         self.assertEqual(group_title, "Test Group")
         self.assertEqual(group_id, "group123")
         self.assertEqual(attachments, [])
+        self.assertIsNone(quote)
 
     def test_extract_message_details_sync_message(self):
         envelope = {
@@ -21,16 +28,17 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
                 "sentMessage": {"message": "Hi there", "groupInfo": {"groupName": "Sync Group", "groupId": "group456"}}
             }
         }
-        msg, group_title, group_id, attachments = _extract_message_details(envelope)
+        msg, group_title, group_id, attachments, quote = _extract_message_details(envelope)
         self.assertEqual(msg, "Hi there")
         self.assertEqual(group_title, "Sync Group")
         self.assertEqual(group_id, "group456")
         self.assertEqual(attachments, [])
+        self.assertIsNone(quote)
 
     @patch("oden.processing.render_report")
     @patch("builtins.open", new_callable=mock_open)
     @patch("os.makedirs")
-    @patch("os.path.exists")
+    @patch("os.path.lexists")
     @patch("oden.config.VAULT_PATH", "mock_vault")
     async def test_process_message_skips_sync_message(self, mock_exists, mock_makedirs, mock_open_file, mock_render):
         """process_message must skip syncMessages (own outgoing messages echoed by signal-cli)."""
@@ -69,7 +77,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
     @patch("oden.processing.render_report")
     @patch("builtins.open", new_callable=mock_open)
     @patch("os.makedirs")
-    @patch("os.path.exists")
+    @patch("os.path.lexists")
     @patch("oden.config.VAULT_PATH", "mock_vault")
     @patch("oden.config.FILENAME_FORMAT", "classic")
     @patch("oden.config.WHITELIST_GROUPS", [])
@@ -91,9 +99,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
         await process_message(message_obj, mock_reader, mock_writer)
 
         mock_makedirs.assert_called_with(os.path.join("mock_vault", "Test Group"), exist_ok=True)
-        mock_open.assert_called_with(
-            os.path.join("mock_vault", "Test Group", "161410-123-John_Doe.md"), "w", encoding="utf-8"
-        )
+        mock_open.assert_called_with(os.path.join("mock_vault", "Test Group", "161410-123-John_Doe.md"), "wb")
 
         # Verify render_report was called with correct arguments
         mock_render.assert_called_once()
@@ -103,10 +109,40 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(call_kwargs["sender_display"], "John Doe ( [[+123]])")
         self.assertEqual(call_kwargs["message"], "Hello world")
 
+    @patch("oden.processing.render_report", return_value="content")
+    @patch("builtins.open", new_callable=mock_open)
+    @patch("os.makedirs")
+    @patch("os.path.lexists", return_value=False)
+    @patch("oden.config.VAULT_PATH", "mock_vault")
+    @patch("oden.config.FILENAME_FORMAT", "classic")
+    @patch("oden.config.WHITELIST_GROUPS", [])
+    @patch("oden.config.IGNORED_GROUPS", set())
+    async def test_process_message_creates_group_dir_once(self, mock_exists, mock_makedirs, mock_open, mock_render):
+        message_obj = {
+            "envelope": {
+                "sourceName": "John Doe",
+                "sourceNumber": "+123",
+                "timestamp": 1765890600000,
+                "dataMessage": {"message": "Hello world", "groupV2": {"name": "Test Group", "id": "group123"}},
+            }
+        }
+
+        await process_message(message_obj, AsyncMock(), AsyncMock())
+        await process_message(message_obj, AsyncMock(), AsyncMock())
+        mock_makedirs.assert_called_once_with(os.path.join("mock_vault", "Test Group"), exist_ok=True)
+
+        # A removed directory is recreated and the write retried once
+        mock_open.side_effect = [FileNotFoundError("gone"), mock_open.return_value]
+        with self.assertLogs("oden.processing", level="INFO") as logs:
+            await process_message(message_obj, AsyncMock(), AsyncMock())
+        self.assertEqual(mock_makedirs.call_count, 2)
+        self.assertTrue(any("WROTE:" in line for line in logs.output))
+        self.assertFalse(any("Failed to write" in line for line in logs.output))
+
     @patch("oden.processing.render_report")
     @patch("builtins.open", new_callable=mock_open)
     @patch("os.makedirs")
-    @patch("os.path.exists")
+    @patch("os.path.lexists")
     @patch("oden.config.VAULT_PATH", "mock_vault")
     @patch("oden.config.FILENAME_FORMAT", "classic")
     @patch("oden.config.WHITELIST_GROUPS", [])
@@ -149,7 +185,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
         att_path = os.path.join(attachment_dir, "1_test.jpg")
 
         # Check calls to open
-        mock_open_mock.assert_any_call(md_path, "w", encoding="utf-8")
+        mock_open_mock.assert_any_call(md_path, "wb")
         mock_open_mock.assert_any_call(att_path, "wb")
 
         # Verify render_report was called with attachment links
@@ -164,7 +200,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
     @patch("oden.processing.render_report")
     @patch("builtins.open", new_callable=mock_open)
     @patch("os.makedirs")
-    @patch("os.path.exists")
+    @patch("os.path.lexists")
     @patch("oden.config.VAULT_PATH", "mock_vault")
     @patch("oden.config.FILENAME_FORMAT", "classic")
     @patch("oden.config.WHITELIST_GROUPS", [])
@@ -191,9 +227,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
         await process_message(message_obj, mock_reader, mock_writer)
 
         mock_makedirs.assert_called_with(os.path.join("mock_vault", "Maps Group"), exist_ok=True)
-        mock_open.assert_called_with(
-            os.path.join("mock_vault", "Maps Group", "161410-456-Jane_Doe.md"), "w", encoding="utf-8"
-        )
+        mock_open.assert_called_with(os.path.join("mock_vault", "Maps Group", "161410-456-Jane_Doe.md"), "wb")
 
         # Verify render_report was called with lat/lon
         mock_render.assert_called_once()
@@ -205,7 +239,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
     @patch("oden.processing.render_report")
     @patch("builtins.open", new_callable=mock_open)
     @patch("os.makedirs")
-    @patch("os.path.exists")
+    @patch("os.path.lexists")
     @patch("oden.config.VAULT_PATH", "mock_vault")
     @patch("oden.config.FILENAME_FORMAT", "classic")
     @patch("oden.config.WHITELIST_GROUPS", [])
@@ -234,9 +268,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
 
         mock_makedirs.assert_called_with(os.path.join("mock_vault", "Test Group"), exist_ok=True)
         # Should create file with -1 suffix since original exists
-        mock_open.assert_called_with(
-            os.path.join("mock_vault", "Test Group", "161410-123-John_Doe-1.md"), "w", encoding="utf-8"
-        )
+        mock_open.assert_called_with(os.path.join("mock_vault", "Test Group", "161410-123-John_Doe-1.md"), "wb")
 
         # Verify render_report was called with correct arguments
         mock_render.assert_called_once()
@@ -292,6 +324,32 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
         mock_get_response.assert_called_once()
         mock_send_reply.assert_not_awaited()
 
+    async def test_send_reply_writes_jsonrpc_frame(self):
+        """_send_reply writes a single newline-terminated JSON-RPC send request."""
+        mock_writer = MagicMock()
+        mock_writer.drain = AsyncMock()
+
+        await _send_reply("group123", "Mottaget ✅", mock_writer)
+
+        mock_writer.writelines.assert_called_once()
+        frame = b"".join(mock_writer.writelines.call_args.args[0])
+        self.assertTrue(frame.endswith(b"\n"))
+        request = json.loads(frame)
+        self.assertEqual(request["method"], "send")
+        self.assertEqual(request["params"], {"groupId": "group123", "message": "Mottaget ✅"})
+        mock_writer.drain.assert_awaited_once()
+
+    async def test_send_reply_uses_unique_request_ids(self):
+        mock_writer = MagicMock()
+        mock_writer.drain = AsyncMock()
+
+        await _send_reply("group123", "a", mock_writer)
+        await _send_reply("group123", "b", mock_writer)
+
+        ids = [json.loads(b"".join(c.args[0]))["id"] for c in mock_writer.writelines.call_args_list]
+        self.assertEqual(len(set(ids)), 2)
+        self.assertTrue(all(i.startswith("send-") for i in ids))
+
     @patch("builtins.open", new_callable=mock_open)
     async def test_process_message_skip_conditions(self, mock_open):
         mock_reader = AsyncMock()
@@ -337,7 +395,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
         await process_message(message_obj, mock_reader, mock_writer)
 
         mock_find_latest.assert_called_once()
-        mock_open.assert_called_once_with("/mock_vault/My Group/recent_file.md", "a", encoding="utf-8")
+        mock_open.assert_called_once_with("/mock_vault/My Group/recent_file.md", "ab")
 
         # Verify render_append was called with correct message (without ++)
         mock_render.assert_called_once()
@@ -400,7 +458,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
         await process_message(message_obj, mock_reader, mock_writer)
 
         mock_find_latest.assert_called_once()
-        mock_open.assert_called_once_with("/mock_vault/My Group/recent_file.md", "a", encoding="utf-8")
+        mock_open.assert_called_once_with("/mock_vault/My Group/recent_file.md", "ab")
 
         # Verify render_append was called with correct message
         mock_render.assert_called_once()
@@ -410,7 +468,7 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
     @patch("oden.processing.render_report")
     @patch("oden.processing._find_latest_file_for_sender")
     @patch("builtins.open", new_callable=mock_open)
-    @patch("os.path.exists", return_value=False)
+    @patch("os.path.lexists", return_value=False)
     @patch("os.makedirs")
     @patch("oden.config.VAULT_PATH", "mock_vault")
     @patch("oden.config.WHITELIST_GROUPS", [])
@@ -494,9 +552,13 @@ class TestProcessing(unittest.IsolatedAsyncioTestCase):
         # Assert that the append logic was triggered
         mock_find_latest.assert_called_once()
         mock_save_attachments.assert_awaited_once()
+        group_dir = mock_find_latest.call_args.args[0]
+        self.assertEqual(mock_save_attachments.call_args.args[1], group_dir)
+        # The message's "now" is reused for the lookup and the attachment folder
+        self.assertEqual(mock_find_latest.call_args.args[3], mock_save_attachments.call_args.args[2])
 
         # Assert that the file was appended to with the new attachment link
-        mock_open.assert_called_once_with("/mock_vault/My Group/recent_file.md", "a", encoding="utf-8")
+        mock_open.assert_called_once_with("/mock_vault/My Group/recent_file.md", "ab")
 
         # Verify render_append was called with attachments
         mock_render.assert_called_once()
@@ -596,6 +658,11 @@ class TestExtractCoordinates(unittest.TestCase):
         result = extract_coordinates(msg)
         self.assertEqual(result, ("40.712776", "-74.005974"))
 
+    def test_first_location_url_wins(self):
+        msg = "https://www.openstreetmap.org/#map=15/1.5/2.5 or https://maps.google.com/maps?q=3.5,4.5"
+        result = extract_coordinates(msg)
+        self.assertEqual(result, ("1.5", "2.5"))
+
     def test_no_location_url(self):
         msg = "Just a normal message with no maps link"
         result = extract_coordinates(msg)
@@ -610,6 +677,10 @@ class TestExtractCoordinates(unittest.TestCase):
         result = extract_coordinates(msg)
         self.assertIsNone(result)
 
+    def test_non_ascii_digits_not_matched(self):
+        msg = "https://maps.google.com/maps?q=\u0665\u0669.5,17.7"
+        self.assertIsNone(extract_coordinates(msg))
+
 
 if __name__ == "__main__":
     unittest.main()
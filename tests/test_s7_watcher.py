@@ -1,12 +1,25 @@
+import asyncio
+import io
+import json
+import os
 import socket
+import sys
+import tempfile
+import threading
 import unittest
+from collections import deque
+from pathlib import Path
 from unittest.mock import ANY, AsyncMock, MagicMock, patch
 
+from oden import signal_manager
 from oden.s7_watcher import (
-    main as s7_main,
+    _run_event_loop,
+    log_groups,
+    send_startup_message,
+    subscribe_and_listen,
 )
 from oden.s7_watcher import (
-    subscribe_and_listen,
+    main as s7_main,
 )
 from oden.signal_manager import SignalManager, is_signal_cli_running
 
@@ -81,6 +94,189 @@ class TestS7Watcher(unittest.IsolatedAsyncioTestCase):
             self.assertTrue(any("Connection to signal-cli daemon failed" in message for message in log.output))
         mock_open_connection.assert_awaited_once_with("host", 1234, limit=ANY)
 
+    @patch("oden.s7_watcher.process_message", new_callable=AsyncMock)
+    @patch("oden.s7_watcher.send_startup_message", new_callable=AsyncMock)
+    @patch("oden.s7_watcher.log_groups", new_callable=AsyncMock, return_value=[])
+    @patch("oden.s7_watcher.update_profile", new_callable=AsyncMock)
+    @patch("asyncio.open_connection")
+    async def test_subscribe_and_listen_dispatches_received_lines(
+        self, mock_open_connection, mock_update, mock_log_groups, mock_startup, mock_process
+    ):
+        """Receive notifications are dispatched; blank and non-JSON lines are skipped."""
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'{"jsonrpc":"2.0","method":"receive","params":{"envelope":{"source":"+1"}}}\r\n')
+        reader.feed_data(b"\n")
+        # Notifications are parsed however they are spaced, even when they hold an id
+        reader.feed_data(b'{"jsonrpc": "2.0", "method": "receive", "params": {"id": 1}}\n')
+        # Replies are dropped without being parsed unless DEBUG logging is enabled
+        reader.feed_data(b'{"jsonrpc":"2.0","id":7,"result":{}}\n')
+        reader.feed_data(b'{"jsonrpc":"2.0","result":{"timestamp":1},"id":"startup-g1-3"}\n')
+        reader.feed_data("inte json \u00e5\n".encode())
+        reader.feed_eof()
+        writer = MagicMock()
+        writer.wait_closed = AsyncMock()
+        mock_open_connection.return_value = (reader, writer)
+
+        with (
+            self.assertLogs("oden.s7_watcher", level="ERROR") as log,
+            patch("oden.s7_watcher.loads", wraps=json.loads) as mock_loads,
+        ):
+            await subscribe_and_listen("host", 1234)
+
+        self.assertEqual(mock_loads.call_count, 3)
+        mock_process.assert_any_await({"envelope": {"source": "+1"}}, reader, writer)
+        mock_process.assert_any_await({"id": 1}, reader, writer)
+        self.assertEqual(mock_process.await_count, 2)
+        self.assertTrue(any("Received non-JSON message: inte json \u00e5" in m for m in log.output))
+        self.assertFalse(any("Could not process message" in m for m in log.output))
+
+    @patch("oden.s7_watcher.process_message", new_callable=AsyncMock)
+    @patch("oden.s7_watcher.send_startup_message", new_callable=AsyncMock)
+    @patch("oden.s7_watcher.log_groups", new_callable=AsyncMock, return_value=[])
+    @patch("oden.s7_watcher.update_profile", new_callable=AsyncMock)
+    @patch("asyncio.open_connection")
+    async def test_subscribe_and_listen_logs_replies_at_debug(
+        self, mock_open_connection, mock_update, mock_log_groups, mock_startup, mock_process
+    ):
+        """With DEBUG enabled, replies are logged, except those to internal requests."""
+        reader = asyncio.StreamReader()
+        reader.feed_data(b'{"jsonrpc":"2.0","id":7,"result":{}}\n')
+        reader.feed_data(b'{"jsonrpc":"2.0","result":{"timestamp":1},"id":"startup-g1-3"}\n')
+        # A notification is parsed even if its content looks like an internal reply id
+        reader.feed_data(b'{"jsonrpc": "2.0", "method": "receive", "params": {"n": {"id":"startup-x"}}}\n')
+        reader.feed_eof()
+        writer = MagicMock()
+        writer.wait_closed = AsyncMock()
+        mock_open_connection.return_value = (reader, writer)
+
+        with (
+            self.assertLogs("oden.s7_watcher", level="DEBUG") as log,
+            patch("oden.s7_watcher.loads", wraps=json.loads) as mock_loads,
+        ):
+            await subscribe_and_listen("host", 1234)
+
+        self.assertEqual(mock_loads.call_count, 2)
+        replies = [m for m in log.output if "Received non-message data" in m]
+        self.assertEqual(len(replies), 1)
+        self.assertIn("'id': 7", replies[0])
+        self.assertFalse(any("Could not process message" in m for m in log.output))
+        mock_process.assert_awaited_once_with({"n": {"id": "startup-x"}}, reader, writer)
+
+    @patch("oden.s7_watcher.process_message", new_callable=AsyncMock)
+    @patch("oden.s7_watcher.send_startup_message", new_callable=AsyncMock)
+    @patch("oden.s7_watcher.log_groups", new_callable=AsyncMock, return_value=[])
+    @patch("oden.s7_watcher.update_profile", new_callable=AsyncMock)
+    @patch("asyncio.open_connection")
+    async def test_subscribe_and_listen_continues_after_processing_error(
+        self, mock_open_connection, mock_update, mock_log_groups, mock_startup, mock_process
+    ):
+        """A failing message is logged and the following messages are still processed."""
+        mock_process.side_effect = [RuntimeError("boom"), None]
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"[1, 2]\n")
+        reader.feed_data(b'{"jsonrpc":"2.0","method":"receive","params":{"n":1}}\n')
+        reader.feed_data(b'{"jsonrpc":"2.0","method":"receive","params":{"n":2}}\n')
+        reader.feed_eof()
+        writer = MagicMock()
+        writer.wait_closed = AsyncMock()
+        mock_open_connection.return_value = (reader, writer)
+
+        with self.assertLogs("oden.s7_watcher", level="ERROR") as log:
+            await subscribe_and_listen("host", 1234)
+
+        self.assertEqual(mock_process.await_count, 2)
+        mock_process.assert_awaited_with({"n": 2}, reader, writer)
+        self.assertEqual(len(log.output), 1)
+        self.assertIn("Could not process message", log.output[0])
+        self.assertIn("boom", log.output[0])
+
+    @patch("oden.s7_watcher.process_message", new_callable=AsyncMock)
+    @patch("oden.config.IGNORED_GROUPS", frozenset())
+    async def test_log_groups_dispatches_notifications_before_reply(self, mock_process):
+        """A message arriving before the listGroups reply is processed after it, not dropped."""
+        reader = asyncio.StreamReader()
+        writer = MagicMock()
+        writer.drain = AsyncMock()
+        # Whether the reply had already been read when the message was processed
+        reply_read = []
+        mock_process.side_effect = lambda *args: reply_read.append(reader.at_eof())
+
+        async def reply_after_notification():
+            await asyncio.sleep(0)
+            request_id = json.loads(writer.write.call_args.args[0])["id"]
+            reader.feed_data(b'{"jsonrpc":"2.0","method":"receive","params":{"envelope":{}}}\n')
+            reader.feed_data(json.dumps({"jsonrpc": "2.0", "id": request_id, "result": [{"name": "A"}]}).encode())
+            reader.feed_data(b"\n")
+            reader.feed_eof()
+
+        feeder = asyncio.create_task(reply_after_notification())
+        groups = await log_groups(reader, writer)
+        await feeder
+
+        self.assertEqual(groups, [{"name": "A"}])
+        mock_process.assert_awaited_once_with({"envelope": {}}, reader, writer)
+        self.assertEqual(reply_read, [True])
+
+    @patch("oden.config.STARTUP_MESSAGE", "all")
+    @patch("oden.config.IGNORED_GROUPS", {"Ignored"})
+    async def test_send_startup_message_all_drains_once(self):
+        """Startup messages to all groups are written together and drained once."""
+        writer = MagicMock()
+        writer.drain = AsyncMock()
+        groups = [
+            {"id": "g1", "name": "One"},
+            {"id": "g2", "name": "Two"},
+            {"id": "g3", "name": "Ignored"},
+            {"name": "No id"},
+        ]
+
+        await send_startup_message(writer, groups)
+
+        writer.writelines.assert_called_once()
+        requests = [json.loads(frame) for frame in writer.writelines.call_args.args[0]]
+        self.assertEqual([r["params"]["groupId"] for r in requests], ["g1", "g2"])
+        for request in requests:
+            self.assertEqual(request["jsonrpc"], "2.0")
+            self.assertEqual(request["method"], "send")
+            self.assertTrue(request["params"]["message"].startswith("🚀 Oden v"))
+            self.assertTrue(request["id"].startswith(f"startup-{request['params']['groupId']}-"))
+        writer.drain.assert_awaited_once()
+
+    @patch("oden.config.STARTUP_MESSAGE", "all")
+    @patch("oden.config.IGNORED_GROUPS", frozenset({"One"}))
+    async def test_send_startup_message_all_groups_ignored(self):
+        """Nothing is written when every group is ignored."""
+        writer = MagicMock()
+        writer.drain = AsyncMock()
+
+        await send_startup_message(writer, [{"id": "g1", "name": "One"}])
+
+        writer.writelines.assert_not_called()
+        writer.drain.assert_not_awaited()
+
+
+class TestRunEventLoop(unittest.TestCase):
+    def test_falls_back_to_asyncio_without_uvloop(self):
+        """Without uvloop the coroutine runs on the default event loop."""
+
+        async def answer():
+            return 42
+
+        with patch.dict(sys.modules, {"uvloop": None}):
+            self.assertEqual(_run_event_loop(answer()), 42)
+
+    def test_uses_uvloop_run_when_installed(self):
+        """With uvloop installed the coroutine is handed to uvloop.run."""
+        fake_uvloop = MagicMock()
+        fake_uvloop.run.side_effect = lambda coro: asyncio.run(coro)
+
+        async def answer():
+            return 42
+
+        with patch.dict(sys.modules, {"uvloop": fake_uvloop}):
+            self.assertEqual(_run_event_loop(answer()), 42)
+        fake_uvloop.run.assert_called_once()
+
 
 @patch.object(SignalManager, "_find_executable", return_value="exec/path")
 class TestSignalManager(unittest.TestCase):
@@ -118,8 +314,11 @@ class TestSignalManager(unittest.TestCase):
     @patch("time.sleep")
     def test_start_success(self, mock_sleep, mock_popen, mock_is_running, mock_find_executable):
         """Tests the successful start of the signal-cli daemon."""
-        mock_is_running.side_effect = [False] * 5 + [True]  # Become available after 5s
+        mock_is_running.side_effect = [False] * 5 + [True]  # Become available after 5 probes
         mock_proc = MagicMock()
+        mock_proc.poll.return_value = None
+        mock_proc.stdout = io.BytesIO(b"")
+        mock_proc.stderr = io.BytesIO(b"")
         mock_popen.return_value = mock_proc
 
         manager = SignalManager("+123", "host", 1234)
@@ -128,6 +327,25 @@ class TestSignalManager(unittest.TestCase):
         mock_popen.assert_called_once()
         self.assertEqual(mock_is_running.call_count, 6)
 
+    @patch("oden.signal_manager.is_signal_cli_running", return_value=False)
+    @patch("subprocess.Popen")
+    def test_start_stops_waiting_when_daemon_exits(self, mock_popen, mock_is_running, mock_find_executable):
+        """A daemon that exits during startup fails fast and its output is logged."""
+        mock_proc = MagicMock()
+        mock_proc.poll.return_value = 1
+        mock_proc.returncode = 1
+        mock_proc.stdout = io.BytesIO(b"")
+        mock_proc.stderr = io.BytesIO(b"Error: account not registered\n")
+        mock_popen.return_value = mock_proc
+
+        manager = SignalManager("+123", "host", 1234)
+        with self.assertLogs("oden.signal_manager", level="ERROR") as log, self.assertRaises(RuntimeError):
+            manager.start()
+
+        self.assertEqual(mock_is_running.call_count, 2)
+        self.assertTrue(any("exited with code 1" in m for m in log.output))
+        self.assertTrue(any("account not registered" in m for m in log.output))
+
     @patch("oden.signal_manager.is_signal_cli_running", return_value=True)
     def test_start_already_running(self, mock_is_running, mock_find_executable):
         """Tests that start does nothing if process is already running."""
@@ -137,7 +355,95 @@ class TestSignalManager(unittest.TestCase):
             mock_popen.assert_not_called()
 
 
+class TestDrainOutput(unittest.TestCase):
+    def test_keeps_tail(self):
+        """Only the last lines of the stream are kept."""
+        tail = deque(maxlen=2)
+        signal_manager._drain_output(io.BytesIO(b"one\ntwo\nthree\n"), tail, threading.Event())
+        self.assertEqual(list(tail), [b"two\n", b"three\n"])
+
+    def test_sets_ready_on_eof(self):
+        """A closed stream wakes the startup poll too."""
+        ready = threading.Event()
+        signal_manager._drain_output(io.BytesIO(b""), deque(), ready)
+        self.assertTrue(ready.is_set())
+
+
+class TestFindSignalCli(unittest.TestCase):
+    def setUp(self):
+        signal_manager._find_signal_cli.cache_clear()
+
+    def tearDown(self):
+        signal_manager._find_signal_cli.cache_clear()
+
+    @patch("oden.signal_manager.get_bundled_signal_cli_path", return_value=None)
+    @patch("shutil.which", return_value="/usr/bin/signal-cli")
+    def test_lookup_is_cached(self, mock_which, mock_bundled):
+        """The filesystem is only searched once per configured path."""
+        self.assertEqual(signal_manager._find_signal_cli(None), "/usr/bin/signal-cli")
+        self.assertEqual(signal_manager._find_signal_cli(None), "/usr/bin/signal-cli")
+        mock_which.assert_called_once_with("signal-cli")
+
+    @patch("oden.signal_manager.get_bundled_signal_cli_path", return_value=None)
+    @patch("os.path.isfile", return_value=False)
+    @patch("shutil.which", return_value=None)
+    def test_missing_executable_is_not_cached(self, mock_which, mock_isfile, mock_bundled):
+        """A failed lookup is retried on the next call."""
+        with self.assertRaises(FileNotFoundError):
+            signal_manager._find_signal_cli(None)
+        mock_which.return_value = "/usr/bin/signal-cli"
+        self.assertEqual(signal_manager._find_signal_cli(None), "/usr/bin/signal-cli")
+
+
+class TestGetSignalCliEnv(unittest.TestCase):
+    def setUp(self):
+        signal_manager._build_signal_cli_env.cache_clear()
+        self.addCleanup(signal_manager._build_signal_cli_env.cache_clear)
+
+    @patch("oden.signal_manager.get_bundled_java_path", return_value=None)
+    def test_returns_independent_copies(self, mock_java):
+        """The environment is built once, and changing one copy leaves the others alone."""
+        env = signal_manager.get_signal_cli_env()
+        env["EXTRA"] = "1"
+        self.assertNotIn("EXTRA", signal_manager.get_signal_cli_env())
+        mock_java.assert_called_once()
+
+
+class TestGetExistingAccounts(unittest.TestCase):
+    def setUp(self):
+        signal_manager._accounts_cache.clear()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.home = Path(self.tmpdir.name) / "home"
+        self.data_path = Path(self.tmpdir.name) / "signal-data"
+        self.accounts_file = self.home / ".local" / "share" / "signal-cli" / "data" / "accounts.json"
+        self.accounts_file.parent.mkdir(parents=True)
+
+    def _write_accounts(self, numbers, mtime_ns):
+        self.accounts_file.write_text(json.dumps({"accounts": [{"number": n} for n in numbers]}))
+        os.utime(self.accounts_file, ns=(mtime_ns, mtime_ns))
+
+    def test_parses_again_only_when_file_changes(self):
+        """accounts.json is re-read after it changes and duplicates are dropped."""
+        self._write_accounts(["+461", "+462", "+461"], 1_000_000_000)
+        with (
+            patch("pathlib.Path.home", return_value=self.home),
+            patch("oden.signal_manager.SIGNAL_DATA_PATH", self.data_path),
+            patch("oden.signal_manager.loads", wraps=json.loads) as mock_loads,
+        ):
+            self.assertEqual(signal_manager.get_existing_accounts(), [{"number": "+461"}, {"number": "+462"}])
+            self.assertEqual(signal_manager.get_existing_accounts(), [{"number": "+461"}, {"number": "+462"}])
+            self.assertEqual(mock_loads.call_count, 1)
+
+            self._write_accounts(["+463"], 2_000_000_000)
+            self.assertEqual(signal_manager.get_existing_accounts(), [{"number": "+463"}])
+            self.assertEqual(mock_loads.call_count, 2)
+
+
 class TestIsSignalCliRunning(unittest.TestCase):
+    def setUp(self):
+        signal_manager._last_seen_running.clear()
+
     @patch("socket.socket")
     def test_is_running_success(self, mock_socket):
         """Tests is_signal_cli_running when connection succeeds."""
@@ -154,6 +460,17 @@ class TestIsSignalCliRunning(unittest.TestCase):
         mock_sock_instance.connect.side_effect = socket.error
         self.assertFalse(is_signal_cli_running("host", "port"))
 
+    @patch("socket.socket")
+    def test_recent_success_is_reused(self, mock_socket):
+        """A probe shortly after a successful one does not connect again."""
+        self.assertTrue(is_signal_cli_running("host", 1234))
+        self.assertTrue(is_signal_cli_running("host", 1234))
+        mock_socket.assert_called_once()
+
+        signal_manager._last_seen_running[("host", 1234)] -= signal_manager._RUNNING_PROBE_TTL
+        self.assertTrue(is_signal_cli_running("host", 1234))
+        self.assertEqual(mock_socket.call_count, 2)
+
 
 if __name__ == "__main__":
     unittest.main()
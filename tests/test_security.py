@@ -7,6 +7,7 @@ from unittest.mock import AsyncMock, patch
 
 from aiohttp.test_utils import AioHTTPTestCase
 
+from oden import processing
 from oden.processing import process_message
 from oden.web_server import create_app, get_api_token
 
@@ -14,10 +15,13 @@ from oden.web_server import create_app, get_api_token
 class TestAttachmentPathTraversal(unittest.IsolatedAsyncioTestCase):
     """Test that attachment filenames are sanitized to prevent path traversal."""
 
+    def setUp(self):
+        processing._ensured_dirs.clear()
+
     @patch("oden.processing.render_report")
     @patch("builtins.open", new_callable=unittest.mock.mock_open)
     @patch("os.makedirs")
-    @patch("os.path.exists", return_value=False)
+    @patch("os.path.lexists", return_value=False)
     @patch("oden.config.VAULT_PATH", "/mock_vault")
     @patch("oden.config.FILENAME_FORMAT", "classic")
     @patch("oden.config.WHITELIST_GROUPS", [])
@@ -64,7 +68,7 @@ class TestAttachmentPathTraversal(unittest.IsolatedAsyncioTestCase):
     @patch("oden.processing.render_report")
     @patch("builtins.open", new_callable=unittest.mock.mock_open)
     @patch("os.makedirs")
-    @patch("os.path.exists", return_value=False)
+    @patch("os.path.lexists", return_value=False)
     @patch("oden.config.VAULT_PATH", "/mock_vault")
     @patch("oden.config.FILENAME_FORMAT", "classic")
     @patch("oden.config.WHITELIST_GROUPS", [])
@@ -100,7 +104,8 @@ class TestAttachmentPathTraversal(unittest.IsolatedAsyncioTestCase):
 
         # Check that only the basename is used (file.jpg, not subdir/hidden/file.jpg)
         calls = mock_open.call_args_list
-        attachment_calls = [c for c in calls if "wb" in str(c)]
+        attachment_calls = [c for c in calls if not c[0][0].endswith(".md")]
+        self.assertTrue(attachment_calls)
         for call in attachment_calls:
             filepath = call[0][0] if call[0] else ""
             # Should end with just the filename, not contain extra subdirs